@@ -1,6 +1,21 @@
 # apartment_scorer.py
 # Phase 1: Core Scoring Engine for Apartment Scorer
 
+import numbers
+from dataclasses import dataclass
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 # ============================================
 # USER SETTINGS (set once)
 # ============================================
@@ -26,11 +41,114 @@ USER_SETTINGS = {
     "market_avg_rent": 1750
 }
 
+# One bit per amenity the scraper / manual input can produce
+AMENITY_BITS = {
+    "covered_parking": 1 << 0,
+    "dishwasher": 1 << 1,
+    "in_unit_laundry": 1 << 2,
+    "ac": 1 << 3,
+    "pool": 1 << 4,
+    "sauna_hot_tub": 1 << 5,
+    "gym": 1 << 6,
+    "package_lockers": 1 << 7,
+}
+
+
+def pack_amenities(amenities):
+    """Packs a list of amenity keys into an AMENITY_BITS mask (unknown keys are ignored)."""
+    mask = 0
+    for amenity in amenities:
+        mask |= AMENITY_BITS.get(amenity, 0)
+    return mask
+
+
+@dataclass(frozen=True, slots=True)
+class ScoringConfig:
+    """USER_SETTINGS with everything the scorers derive from it computed once."""
+    budget_cap: int
+    market_avg: int
+    ideal_bed: int
+    ideal_bath: int
+    ideal_sqft: int
+    necessity_mask: int
+    nice_mask: int
+    nice_total: int
+
+    @classmethod
+    def from_settings(cls, settings):
+        # An unknown key has no bit, so it would silently count as satisfied
+        unknown = [a for a in [*settings["necessities"], *settings["nice_to_haves"]] if a not in AMENITY_BITS]
+        if unknown:
+            raise ValueError(f"Unknown amenities in settings: {', '.join(unknown)} "
+                             f"(known: {', '.join(AMENITY_BITS)})")
+        nice_mask = pack_amenities(settings["nice_to_haves"])
+        return cls(
+            budget_cap=settings["budget_cap"],
+            market_avg=settings["market_avg_rent"],
+            ideal_bed=settings["ideal_bedrooms"],
+            ideal_bath=settings["ideal_bathrooms"],
+            ideal_sqft=settings["ideal_sqft"],
+            necessity_mask=pack_amenities(settings["necessities"]),
+            nice_mask=nice_mask,
+            nice_total=nice_mask.bit_count(),
+        )
+
+
+def as_config(settings):
+    """Accepts a settings dict or an existing ScoringConfig."""
+    if isinstance(settings, ScoringConfig):
+        return settings
+    return ScoringConfig.from_settings(settings)
+
+
+# Substrings that mark a store as a Costco-style warehouse club
+COSTCO_TOKENS = ("costco",)
+
+
+def is_costco(name_lower):
+    return any(token in name_lower for token in COSTCO_TOKENS)
+
+
+def grocery_stats(stores):
+    """
+    One pass over a grocery list. Returns (unique store names within
+    3 miles, closest store distance, closest Costco distance); the
+    distances are inf when there is no such store.
+    """
+    near_names = set()
+    min_dist = float("inf")
+    min_costco_dist = float("inf")
+    for g in stores:
+        d = g["distance_miles"]
+        name_lower = g["name"].lower()  # Local only - the caller's dicts aren't touched
+        if d < min_dist:
+            min_dist = d
+        if d <= 3:
+            near_names.add(name_lower)
+        if d < min_costco_dist and is_costco(name_lower):
+            min_costco_dist = d
+    return len(near_names), min_dist, min_costco_dist
+
 
 # ============================================
 # SCORING FUNCTIONS (each returns 0-100)
 # ============================================
 
+def _round_div(num, den):
+    """round(num / den) for ints without a float detour (ties to even, like round())."""
+    q, r = divmod(num, den)
+    if 2 * r > den or (2 * r == den and q % 2):
+        q += 1
+    return q
+
+
+def _quality_points(avg_rating):
+    """0-50 pts, 4.5+ avg = 50, scaling linearly below that."""
+    if avg_rating is None:
+        return 25  # Neutral
+    return min(50, round((avg_rating / 4.5) * 50))
+
+
 def score_price(rent, settings):
     """
     50 pts from budget comparison:
@@ -40,24 +158,17 @@ def score_price(rent, settings):
       - At or below market avg = 50
       - Every $100 above avg = -10 pts
     """
-    budget_cap = settings["budget_cap"]
-    market_avg = settings["market_avg_rent"]
-
-    # Budget comparison (50 pts max)
-    if rent <= budget_cap:
-        # Reward being under budget: closer to $0 = higher score
-        budget_score = 50
-    else:
-        over = rent - budget_cap
-        budget_score = max(0, 50 - (over / 100) * 10)
+    cfg = as_config(settings)
+    over_budget = max(0, rent - cfg.budget_cap)
+    over_market = max(0, rent - cfg.market_avg)
 
-    # Market comparison (50 pts max)
-    if rent <= market_avg:
-        market_score = 50
-    else:
-        over = rent - market_avg
-        market_score = max(0, 50 - (over / 100) * 10)
+    if isinstance(rent, numbers.Integral):
+        # Whole dollars: work in tenths of a point (every $1 over costs 0.1 pts)
+        return _round_div(max(0, 500 - over_budget) + max(0, 500 - over_market), 10)
 
+    # Budget comparison (50 pts max) + market comparison (50 pts max)
+    budget_score = max(0, 50 - (over_budget / 100) * 10)
+    market_score = max(0, 50 - (over_market / 100) * 10)
     return round(budget_score + market_score)
 
 
@@ -67,9 +178,10 @@ def score_rooms(bedrooms, bathrooms, sqft, settings):
     40 pts: Bathroom match
     20 pts: Square footage bonus
     """
-    ideal_bed = settings["ideal_bedrooms"]
-    ideal_bath = settings["ideal_bathrooms"]
-    ideal_sqft = settings["ideal_sqft"]
+    cfg = as_config(settings)
+    ideal_bed = cfg.ideal_bed
+    ideal_bath = cfg.ideal_bath
+    ideal_sqft = cfg.ideal_sqft
 
     # Bedroom score (40 pts)
     bed_diff = abs(bedrooms - ideal_bed)
@@ -82,7 +194,7 @@ def score_rooms(bedrooms, bathrooms, sqft, settings):
     # Sqft bonus (20 pts)
     if sqft >= ideal_sqft:
         sqft_score = 20
-    elif sqft >= ideal_sqft * 0.8:
+    elif sqft * 5 >= ideal_sqft * 4:  # Within 80% of ideal
         sqft_score = 10
     else:
         sqft_score = 0
@@ -93,24 +205,28 @@ def score_rooms(bedrooms, bathrooms, sqft, settings):
 def score_necessities(amenities, settings):
     """
     All-or-nothing: All necessities present = 100, any missing = 0
+    amenities = list of amenity keys or a pack_amenities() mask
     """
-    for necessity in settings["necessities"]:
-        if necessity not in amenities:
-            return 0
-    return 100
+    cfg = as_config(settings)
+    amenities = int(amenities) if isinstance(amenities, numbers.Integral) else pack_amenities(amenities)
+    necessity_mask = cfg.necessity_mask
+    return 100 if amenities & necessity_mask == necessity_mask else 0
 
 
 def score_nice_to_haves(amenities, settings):
     """
     Proportional: Each nice-to-have present = equal share of 100
     4 nice-to-haves = 25 pts each
+    amenities = list of amenity keys or a pack_amenities() mask
     """
-    nice_list = settings["nice_to_haves"]
-    total = len(nice_list)
+    cfg = as_config(settings)
+    nice_mask = cfg.nice_mask
+    total = cfg.nice_total
     if total == 0:
         return 100
 
-    count = sum(1 for item in nice_list if item in amenities)
+    amenities = int(amenities) if isinstance(amenities, numbers.Integral) else pack_amenities(amenities)
+    count = (amenities & nice_mask).bit_count()
     return round((count / total) * 100)
 
 
@@ -144,16 +260,13 @@ def score_restaurants(restaurant_count, avg_rating):
       - 4.5+ avg = 50
       - Scales linearly below that
     """
-    # Density score (50 pts)
-    density = min(50, round((restaurant_count / 20) * 50))
+    # Density score (50 pts): 2.5 pts per restaurant
+    density = min(50, _round_div(restaurant_count * 5, 2))
 
     # Quality score (50 pts)
-    if avg_rating is None:
-        quality = 25  # Neutral
-    else:
-        quality = min(50, round((avg_rating / 4.5) * 50))
+    quality = _quality_points(avg_rating)
 
-    return round(density + quality)
+    return density + quality
 
 
 def score_commute(drive_minutes, transit_available):
@@ -185,7 +298,7 @@ def score_commute(drive_minutes, transit_available):
     transit_map = {"nearby": 30, "some": 15, "none": 0}
     transit_score = transit_map.get(transit_available, 0)
 
-    return round(drive_score + transit_score)
+    return drive_score + transit_score
 
 
 def score_nightlife(venue_count, avg_rating):
@@ -194,14 +307,10 @@ def score_nightlife(venue_count, avg_rating):
     50 pts density (10+ venues = full marks)
     50 pts quality (avg rating)
     """
-    density = min(50, round((venue_count / 10) * 50))
+    density = min(50, venue_count * 5)
+    quality = _quality_points(avg_rating)
 
-    if avg_rating is None:
-        quality = 25
-    else:
-        quality = min(50, round((avg_rating / 4.5) * 50))
-
-    return round(density + quality)
+    return density + quality
 
 
 def score_grocery(grocery_data):
@@ -217,14 +326,12 @@ def score_grocery(grocery_data):
     """
     if not grocery_data:
         return 0
+    unique_types, closest, costco_dist = grocery_stats(grocery_data)
 
     # Variety score (40 pts) - unique stores within 3 miles
-    nearby = [g for g in grocery_data if g["distance_miles"] <= 3]
-    unique_types = len(set(g["name"].lower() for g in nearby))
     variety_score = min(40, round((unique_types / 5) * 40))
 
     # Closest grocery (30 pts)
-    closest = min(g["distance_miles"] for g in grocery_data)
     if closest <= 0.5:
         proximity_score = 30
     elif closest <= 1:
@@ -236,18 +343,13 @@ def score_grocery(grocery_data):
     else:
         proximity_score = 0
 
-    # Costco bonus (30 pts)
-    costco = [g for g in grocery_data if "costco" in g["name"].lower()]
-    if costco:
-        costco_dist = min(c["distance_miles"] for c in costco)
-        if costco_dist <= 3:
-            costco_score = 30
-        elif costco_dist <= 5:
-            costco_score = 20
-        elif costco_dist <= 10:
-            costco_score = 10
-        else:
-            costco_score = 0
+    # Costco bonus (30 pts) - costco_dist is inf when there is none
+    if costco_dist <= 3:
+        costco_score = 30
+    elif costco_dist <= 5:
+        costco_score = 20
+    elif costco_dist <= 10:
+        costco_score = 10
     else:
         costco_score = 0
 
@@ -262,19 +364,21 @@ def score_apartment(apartment, neighborhood_data, settings=USER_SETTINGS):
     """
     Takes apartment data + auto-fetched neighborhood data.
     Returns all 10 category scores + overall score.
+    settings = USER_SETTINGS-style dict or a prebuilt ScoringConfig
     """
+    cfg = as_config(settings)
     scores = {}
 
     # Manual input scores
-    scores["price"] = score_price(apartment["rent"], settings)
+    scores["price"] = score_price(apartment["rent"], cfg)
     scores["rooms"] = score_rooms(
         apartment["bedrooms"],
         apartment["bathrooms"],
         apartment["sqft"],
-        settings
+        cfg
     )
-    scores["necessities"] = score_necessities(apartment["amenities"], settings)
-    scores["nice_to_haves"] = score_nice_to_haves(apartment["amenities"], settings)
+    scores["necessities"] = score_necessities(apartment["amenities"], cfg)
+    scores["nice_to_haves"] = score_nice_to_haves(apartment["amenities"], cfg)
 
     # Auto-fetched neighborhood scores
     scores["schools"] = score_schools(neighborhood_data.get("school_ratings", []))
@@ -299,6 +403,319 @@ def score_apartment(apartment, neighborhood_data, settings=USER_SETTINGS):
     return scores
 
 
+# ============================================
+# BATCH SCORING (NumPy, one column per field)
+# ============================================
+# Same rules as the scalar scorers above, but each function takes 1-D arrays
+# (one entry per apartment) and scores the whole batch in one pass.
+
+TRANSIT_CODES = {"none": 0, "some": 1, "nearby": 2}
+TRANSIT_POINTS = (0, 15, 30)  # Indexed by TRANSIT_CODES value
+
+# Threshold tables for the if/elif scorers: points[np.searchsorted(bins, x)]
+# gives points[0] for x <= bins[0], ..., points[-1] above the last bin
+COMMUTE_BINS, COMMUTE_POINTS = (10, 20, 30, 45), (70, 55, 40, 25, 10)
+GROCERY_BINS, GROCERY_POINTS = (0.5, 1, 2, 3), (30, 25, 15, 10, 0)
+COSTCO_BINS, COSTCO_POINTS = (3, 5, 10), (30, 20, 10, 0)
+
+
+def score_price_vec(rents, settings):
+    """Vectorized score_price. rents = float array."""
+    cfg = as_config(settings)
+    budget = np.clip(50 - np.maximum(0, rents - cfg.budget_cap) / 10, 0, 50)
+    market = np.clip(50 - np.maximum(0, rents - cfg.market_avg) / 10, 0, 50)
+    return np.round(budget + market)
+
+
+def score_rooms_vec(bedrooms, bathrooms, sqft, settings):
+    """Vectorized score_rooms."""
+    cfg = as_config(settings)
+    ideal_sqft = cfg.ideal_sqft
+    bed_score = np.clip(40 - 20 * np.abs(bedrooms - cfg.ideal_bed), 0, 40)
+    bath_score = np.clip(40 - 20 * np.abs(bathrooms - cfg.ideal_bath), 0, 40)
+    sqft_score = np.where(sqft >= ideal_sqft, 20, np.where(sqft >= ideal_sqft * 0.8, 10, 0))
+    return np.round(bed_score + bath_score + sqft_score)
+
+
+def score_schools_vec(school_avg):
+    """Vectorized score_schools. school_avg = average rating, NaN if no data."""
+    return np.where(np.isnan(school_avg), 50, np.round(school_avg * 10))
+
+
+def score_crime_vec(crime_index):
+    """Vectorized score_crime. crime_index = NaN if no data."""
+    return np.where(np.isnan(crime_index), 50, np.round(np.maximum(0, 100 - crime_index)))
+
+
+def _density_quality_vec(count, avg_rating, full_count):
+    """Shared 50 pts density + 50 pts quality ramp (restaurants / nightlife)."""
+    density = np.minimum(50, np.round((count / full_count) * 50))
+    quality = np.where(np.isnan(avg_rating), 25, np.minimum(50, np.round((avg_rating / 4.5) * 50)))
+    return density + quality
+
+
+def score_restaurants_vec(restaurant_count, avg_rating):
+    """Vectorized score_restaurants. avg_rating = NaN if no data."""
+    return _density_quality_vec(restaurant_count, avg_rating, 20)
+
+
+def score_nightlife_vec(venue_count, avg_rating):
+    """Vectorized score_nightlife. avg_rating = NaN if no data."""
+    return _density_quality_vec(venue_count, avg_rating, 10)
+
+
+def score_necessities_vec(amenity_masks, settings):
+    """Vectorized score_necessities. amenity_masks = uint16 pack_amenities() masks."""
+    cfg = as_config(settings)
+    necessity_mask = cfg.necessity_mask
+    return np.where(np.bitwise_and(amenity_masks, necessity_mask) == necessity_mask, 100, 0)
+
+
+def _popcount16(masks):
+    return np.unpackbits(masks.astype(np.uint16).view(np.uint8)).reshape(-1, 16).sum(axis=1)
+
+
+def score_nice_to_haves_vec(amenity_masks, settings):
+    """Vectorized score_nice_to_haves. amenity_masks = uint16 pack_amenities() masks."""
+    cfg = as_config(settings)
+    nice_mask = cfg.nice_mask
+    total = cfg.nice_total
+    if total == 0:
+        return np.full(amenity_masks.shape, 100)
+    count = _popcount16(np.bitwise_and(amenity_masks, nice_mask))
+    return np.round((count / total) * 100)
+
+
+def score_commute_vec(drive_minutes, transit_codes):
+    """Vectorized score_commute. transit_codes = TRANSIT_CODES values."""
+    drive_score = np.asarray(COMMUTE_POINTS)[np.searchsorted(COMMUTE_BINS, drive_minutes)]
+    return drive_score + np.asarray(TRANSIT_POINTS)[transit_codes]
+
+
+def score_grocery_vec(variety, closest, costco_closest):
+    """Vectorized score_grocery over grocery_stats() columns (inf = no such store)."""
+    variety_score = np.minimum(40, np.round((variety / 5) * 40))
+    proximity = np.asarray(GROCERY_POINTS)[np.searchsorted(GROCERY_BINS, closest)]
+    costco = np.asarray(COSTCO_POINTS)[np.searchsorted(COSTCO_BINS, costco_closest)]
+    return np.where(np.isinf(closest), 0, variety_score + proximity + costco)
+
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+
+def build_score_columns(apartments, neighborhoods):
+    """
+    Converts parallel lists of apartment / neighborhood dicts into
+    contiguous float32 columns (one array per field) for the *_vec scorers.
+    """
+    n = len(apartments)
+    school_avg = []
+    grocery_variety, grocery_closest, costco_closest = [], [], []
+    for nbr in neighborhoods:
+        ratings = nbr.get("school_ratings", [])
+        school_avg.append(sum(ratings) / len(ratings) if ratings else np.nan)
+
+        # Reduce each grocery list to the three numbers score_grocery uses
+        variety, closest, costco = grocery_stats(nbr.get("grocery_stores", []))
+        grocery_variety.append(variety)
+        grocery_closest.append(closest)
+        costco_closest.append(costco)
+
+    return {
+        "amenity_mask": np.fromiter((pack_amenities(a["amenities"]) for a in apartments), np.uint16, n),
+        "rent": np.fromiter((a["rent"] for a in apartments), np.float32, n),
+        "bedrooms": np.fromiter((a["bedrooms"] for a in apartments), np.float32, n),
+        "bathrooms": np.fromiter((a["bathrooms"] for a in apartments), np.float32, n),
+        "sqft": np.fromiter((a["sqft"] for a in apartments), np.float32, n),
+        "school_avg": np.asarray(school_avg, np.float32),
+        "crime_index": np.fromiter(
+            (_nan_if_none(nbr.get("crime_index")) for nbr in neighborhoods), np.float32, n),
+        "restaurant_count": np.fromiter(
+            (nbr.get("restaurant_count", 0) for nbr in neighborhoods), np.float32, n),
+        "restaurant_avg_rating": np.fromiter(
+            (_nan_if_none(nbr.get("restaurant_avg_rating")) for nbr in neighborhoods), np.float32, n),
+        "drive_minutes": np.fromiter(
+            (nbr.get("drive_minutes", 60) for nbr in neighborhoods), np.float32, n),
+        "transit_code": np.fromiter(
+            (TRANSIT_CODES.get(nbr.get("transit_available", "none"), 0) for nbr in neighborhoods),
+            np.intp, n),
+        "nightlife_count": np.fromiter(
+            (nbr.get("nightlife_count", 0) for nbr in neighborhoods), np.float32, n),
+        "nightlife_avg_rating": np.fromiter(
+            (_nan_if_none(nbr.get("nightlife_avg_rating")) for nbr in neighborhoods), np.float32, n),
+        "grocery_variety": np.asarray(grocery_variety, np.float32),
+        "grocery_closest": np.asarray(grocery_closest, np.float32),
+        "costco_closest": np.asarray(costco_closest, np.float32),
+    }
+
+
+# ============================================
+# BATCH SCORING (Numba kernel)
+# ============================================
+# Column order of the batch score matrix
+CATEGORY_ORDER = ("price", "rooms", "necessities", "nice_to_haves", "schools",
+                  "crime", "restaurants", "commute", "nightlife", "grocery")
+IDX = {category: i for i, category in enumerate(CATEGORY_ORDER)}
+
+if NUMBA_AVAILABLE:
+    # No "nnan"/"ninf": missing data is encoded as NaN / inf in the columns
+    # and no "arcp": x / 10 must stay exact for the .5 rounding ties
+    _FASTMATH = {"nsz", "contract", "afn", "reassoc"}
+
+    @njit(parallel=True, fastmath=_FASTMATH, cache=True)
+    def _score_kernel(rents, beds, baths, sqft, amenity_mask, necessity_mask, nice_mask,
+                      school_avg, crime,
+                      rest_cnt, rest_rat, drive, transit_code, night_cnt, night_rat,
+                      grocery_variety, grocery_closest, costco_closest,
+                      budget_cap, market_avg, ideal_bed, ideal_bath, ideal_sqft,
+                      transit_points, out):
+        """Scores every apartment into out[i, CATEGORY_ORDER index]."""
+        for i in prange(rents.shape[0]):
+            # Price
+            budget = 50.0 - max(0.0, rents[i] - budget_cap) / 10
+            market = 50.0 - max(0.0, rents[i] - market_avg) / 10
+            out[i, 0] = round(min(50.0, max(0.0, budget)) + min(50.0, max(0.0, market)))
+
+            # Rooms
+            bed_score = max(0.0, 40 - abs(beds[i] - ideal_bed) * 20)
+            bath_score = max(0.0, 40 - abs(baths[i] - ideal_bath) * 20)
+            if sqft[i] >= ideal_sqft:
+                sqft_score = 20
+            elif sqft[i] >= ideal_sqft * 0.8:
+                sqft_score = 10
+            else:
+                sqft_score = 0
+            out[i, 1] = round(bed_score + bath_score + sqft_score)
+
+            # Amenities
+            mask = amenity_mask[i]
+            out[i, 2] = 100 if mask & necessity_mask == necessity_mask else 0
+            if nice_mask == 0:
+                out[i, 3] = 100
+            else:
+                hits = mask & nice_mask
+                count = 0
+                total = 0
+                for bit in range(16):
+                    count += (hits >> bit) & 1
+                    total += (nice_mask >> bit) & 1
+                out[i, 3] = round((count / total) * 100)
+
+            # Schools / crime
+            out[i, 4] = 50 if np.isnan(school_avg[i]) else round(school_avg[i] * 10)
+            out[i, 5] = 50 if np.isnan(crime[i]) else round(max(0.0, 100 - crime[i]))
+
+            # Restaurants / nightlife
+            quality = 25 if np.isnan(rest_rat[i]) else min(50, round((rest_rat[i] / 4.5) * 50))
+            out[i, 6] = min(50, round((rest_cnt[i] / 20) * 50)) + quality
+            quality = 25 if np.isnan(night_rat[i]) else min(50, round((night_rat[i] / 4.5) * 50))
+            out[i, 8] = min(50, round((night_cnt[i] / 10) * 50)) + quality
+
+            # Commute
+            if drive[i] <= 10:
+                drive_score = 70
+            elif drive[i] <= 20:
+                drive_score = 55
+            elif drive[i] <= 30:
+                drive_score = 40
+            elif drive[i] <= 45:
+                drive_score = 25
+            else:
+                drive_score = 10
+            out[i, 7] = drive_score + transit_points[transit_code[i]]
+
+            # Grocery (closest = inf means no stores at all)
+            if np.isinf(grocery_closest[i]):
+                out[i, 9] = 0
+                continue
+            variety = min(40, round((grocery_variety[i] / 5) * 40))
+            closest = grocery_closest[i]
+            if closest <= 0.5:
+                proximity = 30
+            elif closest <= 1:
+                proximity = 25
+            elif closest <= 2:
+                proximity = 15
+            elif closest <= 3:
+                proximity = 10
+            else:
+                proximity = 0
+            costco_dist = costco_closest[i]
+            if costco_dist <= 3:
+                costco = 30
+            elif costco_dist <= 5:
+                costco = 20
+            elif costco_dist <= 10:
+                costco = 10
+            else:
+                costco = 0
+            out[i, 9] = variety + proximity + costco
+
+
+def _run_score_kernel(cols, cfg):
+    out = np.empty((cols["rent"].shape[0], len(CATEGORY_ORDER)), np.int16)
+    _score_kernel(
+        cols["rent"], cols["bedrooms"], cols["bathrooms"], cols["sqft"],
+        cols["amenity_mask"], np.uint16(cfg.necessity_mask), np.uint16(cfg.nice_mask),
+        cols["school_avg"], cols["crime_index"],
+        cols["restaurant_count"], cols["restaurant_avg_rating"],
+        cols["drive_minutes"], cols["transit_code"],
+        cols["nightlife_count"], cols["nightlife_avg_rating"],
+        cols["grocery_variety"], cols["grocery_closest"], cols["costco_closest"],
+        float(cfg.budget_cap), float(cfg.market_avg),
+        float(cfg.ideal_bed), float(cfg.ideal_bath),
+        float(cfg.ideal_sqft), np.asarray(TRANSIT_POINTS, np.int16), out
+    )
+    return out
+
+
+def score_apartments_batch(apartments, neighborhoods, settings=USER_SETTINGS):
+    """
+    Scores many apartments at once. neighborhoods[i] belongs to apartments[i].
+    Returns (scores, overall): scores is an (N, 10) int16 matrix with columns
+    in CATEGORY_ORDER (scores[i, IDX["price"]]), overall has N entries.
+    Uses the Numba kernel when available, else the NumPy *_vec scorers.
+    """
+    cfg = as_config(settings)
+    if not NUMPY_AVAILABLE:
+        print("⚠️  numpy not installed. Scoring apartments one at a time.")
+        rows = [score_apartment(a, n, cfg) for a, n in zip(apartments, neighborhoods)]
+        return [[row[key] for key in CATEGORY_ORDER] for row in rows], [row["overall"] for row in rows]
+
+    cols = build_score_columns(apartments, neighborhoods)
+
+    if NUMBA_AVAILABLE:
+        scores = _run_score_kernel(cols, cfg)
+    else:
+        scores = np.empty((len(apartments), len(CATEGORY_ORDER)), np.int16)
+        scores[:, IDX["price"]] = score_price_vec(cols["rent"], cfg)
+        scores[:, IDX["rooms"]] = score_rooms_vec(cols["bedrooms"], cols["bathrooms"], cols["sqft"], cfg)
+        scores[:, IDX["necessities"]] = score_necessities_vec(cols["amenity_mask"], cfg)
+        scores[:, IDX["nice_to_haves"]] = score_nice_to_haves_vec(cols["amenity_mask"], cfg)
+        scores[:, IDX["schools"]] = score_schools_vec(cols["school_avg"])
+        scores[:, IDX["crime"]] = score_crime_vec(cols["crime_index"])
+        scores[:, IDX["restaurants"]] = score_restaurants_vec(cols["restaurant_count"], cols["restaurant_avg_rating"])
+        scores[:, IDX["commute"]] = score_commute_vec(cols["drive_minutes"], cols["transit_code"])
+        scores[:, IDX["nightlife"]] = score_nightlife_vec(cols["nightlife_count"], cols["nightlife_avg_rating"])
+        scores[:, IDX["grocery"]] = score_grocery_vec(
+            cols["grocery_variety"], cols["grocery_closest"], cols["costco_closest"])
+
+    overall = np.round(scores.mean(axis=1)).astype(np.int16)
+
+    return scores, overall
+
+
+def warmup():
+    """
+    Compiles (or loads from Numba's cache) the batch kernel ahead of time.
+    Optional - otherwise the first score_apartments_batch call compiles it.
+    """
+    if NUMBA_AVAILABLE:
+        score_apartments_batch(
+            [{"rent": 0, "bedrooms": 0, "bathrooms": 0, "sqft": 0, "amenities": []}], [{}])
+
+
 # ============================================
 # COLOR CODING HELPER
 # ============================================
@@ -375,24 +792,3 @@ if __name__ == "__main__":
             print(f"  {category.replace('_', ' ').title():20s} {bar} {score}/100 ({color})")
 
     print(f"\n{'='*50}")
-```
-
-This is the complete Phase 1 scoring engine. If you run that example at the bottom, it'll output something like:
-```
-==================================================
-  The Nordic Apartments
-  1234 Hennepin Ave, Minneapolis, MN 55403
-==================================================
-
-  OVERALL SCORE: 77/100
-
-  Price                ████████████████░░░░ 80/100 (green)
-  Rooms                ████████████████████ 100/100 (green)
-  Necessities          ████████████████████ 100/100 (green)
-  Nice To Haves        ███████████████░░░░░ 75/100 (green)
-  Schools              ██████████████░░░░░░ 70/100 (yellow)
-  Crime                █████████████░░░░░░░ 65/100 (yellow)
-  Restaurants          ████████████████████ 97/100 (green)
-  Commute              █████████████████░░░ 85/100 (green)
-  Nightlife            ████████████████████ 94/100 (green)
-  Grocery              ██████████████░░░░░░ 70/100 (yellow)
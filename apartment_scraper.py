@@ -2,15 +2,43 @@
 # Phase 2: Web Scraper + Manual Input Fallback
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import os
 import json
 import re
 
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup backend
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Keep-alive session reused across scrapes (skips a TLS handshake per listing)
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504])
+))
+
 
 # ============================================
 # PLAN A: AUTO-SCRAPE FROM URL
 # ============================================
 
+def declared_charset(headers):
+    """The charset named in Content-Type, or None."""
+    if "charset=" not in headers.get("Content-Type", "").lower():
+        return None
+    return requests.utils.get_encoding_from_headers(headers)
+
+
 def scrape_apartments_com(url):
     """
     Attempts to scrape apartment data from an apartments.com listing.
@@ -22,13 +50,15 @@ def scrape_apartments_com(url):
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = SESSION.get(url, headers=headers, timeout=15)
 
         if response.status_code != 200:
             print(f"⚠️  Website returned status {response.status_code}. Falling back to manual input.")
             return None
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        # No declared charset: read as UTF-8 instead of requests' ISO-8859-1 default
+        response.encoding = declared_charset(response.headers) or "utf-8"
+        soup = BeautifulSoup(response.text, HTML_PARSER)
 
         # Extract apartment data from page
         apartment = {
@@ -54,6 +84,23 @@ def scrape_apartments_com(url):
         return None
 
 
+def select_grouped(soup, selectors):
+    """
+    Walks the page once with the union of all selectors and returns the
+    matches grouped per selector (in the same order as `selectors`).
+    """
+    matches = soup.select(", ".join(selectors))
+    return [[el for el in matches if el.css.match(selector)] for selector in selectors]
+
+
+def extract_first_text(soup, selectors):
+    """Text of the first element matched by the highest-priority selector."""
+    for group in select_grouped(soup, selectors):
+        if group and group[0].text.strip():
+            return group[0].text.strip()
+    return None
+
+
 def extract_name(soup):
     """Extract apartment complex name."""
     # Try common selectors for apartment name
@@ -63,11 +110,7 @@ def extract_name(soup):
         "h1",
         ".community-name"
     ]
-    for selector in selectors:
-        el = soup.select_one(selector)
-        if el and el.text.strip():
-            return el.text.strip()
-    return None
+    return extract_first_text(soup, selectors)
 
 
 def extract_address(soup):
@@ -78,39 +121,44 @@ def extract_address(soup):
         ".community-address",
         "span.delivery-address"
     ]
-    for selector in selectors:
-        el = soup.select_one(selector)
-        if el and el.text.strip():
-            return el.text.strip()
-    return None
+    return extract_first_text(soup, selectors)
+
+
+# Price patterns like $1,200 - $2,500
+PRICE_RE = re.compile(r'\$[\d,]+')
 
 
 def extract_rent(soup):
     """Extract rent prices."""
     prices = []
-    # Look for price patterns like $1,200 - $2,500
-    price_pattern = re.compile(r'\$[\d,]+')
-    
+
     selectors = [
         ".rentRollup",
         ".price-range",
         "[data-testid='price']",
         ".rent-range"
     ]
-    for selector in selectors:
-        elements = soup.select(selector)
-        for el in elements:
-            found = price_pattern.findall(el.text)
-            prices.extend(found)
+    for el in soup.select(", ".join(selectors)):
+        prices.extend(PRICE_RE.findall(el.text))
     
     if not prices:
         # Broader search
         text = soup.get_text()
-        prices = price_pattern.findall(text)[:10]  # Limit to first 10
+        prices = PRICE_RE.findall(text)[:10]  # Limit to first 10
 
     return list(set(prices))
 
 
+# One pass over a plan's text finds beds / baths / sqft / rent; the first
+# match of each group wins, same as searching for each field separately.
+PLAN_FIELDS_RE = re.compile(
+    r'(?P<beds>\d+)\s*(?:bed|br|bedroom)'
+    r'|(?P<baths>\d+)\s*(?:bath|ba|bathroom)'
+    r'|(?P<sqft>[\d,]+)\s*(?:sq\s*ft|sqft|sf)'
+    r'|\$(?P<rent>[\d,]+)'
+)
+
+
 def extract_floor_plans(soup):
     """
     Extract floor plan details.
@@ -126,37 +174,29 @@ def extract_floor_plans(soup):
         ".floorplan"
     ]
 
-    for selector in selectors:
-        elements = soup.select(selector)
-        for el in elements:
-            text = el.get_text(separator=" ").lower()
+    # Keep selector priority order; an element matched by several selectors is parsed once
+    seen = set()
+    for group in select_grouped(soup, selectors):
+        for el in group:
+            if id(el) in seen:
+                continue
+            seen.add(id(el))
+
+            raw = el.get_text(separator=" ").strip()
+            text = raw.lower()
             plan = {
-                "raw_text": el.get_text(separator=" ").strip()[:200],
+                "raw_text": raw[:200],
                 "beds": None,
                 "baths": None,
                 "sqft": None,
                 "rent": None
             }
 
-            # Parse beds
-            bed_match = re.search(r'(\d+)\s*(?:bed|br|bedroom)', text)
-            if bed_match:
-                plan["beds"] = int(bed_match.group(1))
-
-            # Parse baths
-            bath_match = re.search(r'(\d+)\s*(?:bath|ba|bathroom)', text)
-            if bath_match:
-                plan["baths"] = int(bath_match.group(1))
-
-            # Parse sqft
-            sqft_match = re.search(r'([\d,]+)\s*(?:sq\s*ft|sqft|sf)', text)
-            if sqft_match:
-                plan["sqft"] = int(sqft_match.group(1).replace(",", ""))
-
-            # Parse rent
-            rent_match = re.search(r'\$([\d,]+)', text)
-            if rent_match:
-                plan["rent"] = int(rent_match.group(1).replace(",", ""))
+            # Parse beds / baths / sqft / rent
+            for match in PLAN_FIELDS_RE.finditer(text):
+                field = match.lastgroup
+                if plan[field] is None:
+                    plan[field] = int(match.group(field).replace(",", ""))
 
             plans.append(plan)
 
@@ -189,66 +229,89 @@ def extract_amenities(soup):
         ".propertyFeatures li"
     ]
 
-    for selector in selectors:
-        elements = soup.select(selector)
-        for el in elements:
-            text = el.get_text(separator=" ").strip().lower()
-            if text and len(text) < 100:
-                amenities.append(text)
+    for el in soup.select(", ".join(selectors)):
+        text = el.get_text(separator=" ").strip().lower()
+        if text and len(text) < 100:
+            amenities.append(text)
 
     return list(set(amenities))
 
 
+AMENITY_KEYWORD_MAP = {
+    "covered_parking": ["covered parking", "garage", "indoor parking", "heated parking"],
+    "dishwasher": ["dishwasher"],
+    "in_unit_laundry": ["in-unit laundry", "in unit laundry", "washer/dryer",
+                        "washer and dryer", "in-home laundry", "w/d in unit"],
+    "ac": ["air conditioning", "a/c", "central air", "ac", "climate control"],
+    "pool": ["pool", "swimming"],
+    "sauna_hot_tub": ["sauna", "hot tub", "spa", "steam room"],
+    "gym": ["gym", "fitness", "exercise", "workout"],
+    "package_lockers": ["package", "parcel", "locker", "mailroom"]
+}
+
+
+def _build_amenity_matcher():
+    """
+    Builds the keyword matcher once at import: a single Aho-Corasick
+    automaton (keyword -> amenity keys) when pyahocorasick is installed,
+    otherwise one compiled alternation regex per amenity key.
+    """
+    if AHOCORASICK_AVAILABLE:
+        keys_by_keyword = {}
+        for amenity_key, keywords in AMENITY_KEYWORD_MAP.items():
+            for kw in keywords:
+                keys_by_keyword.setdefault(kw, set()).add(amenity_key)
+
+        automaton = ahocorasick.Automaton()
+        for kw, keys in keys_by_keyword.items():
+            automaton.add_word(kw, tuple(keys))
+        automaton.make_automaton()
+        return automaton
+
+    return {
+        amenity_key: re.compile("|".join(map(re.escape, keywords)))
+        for amenity_key, keywords in AMENITY_KEYWORD_MAP.items()
+    }
+
+
+_AMENITY_MATCHER = _build_amenity_matcher()
+
+
 def classify_amenities(raw_amenities):
     """
     Takes raw amenity strings and classifies them into
     our system's necessity/nice-to-have categories.
     """
-    classified = []
-
-    keyword_map = {
-        "covered_parking": ["covered parking", "garage", "indoor parking", "heated parking"],
-        "dishwasher": ["dishwasher"],
-        "in_unit_laundry": ["in-unit laundry", "in unit laundry", "washer/dryer", 
-                            "washer and dryer", "in-home laundry", "w/d in unit"],
-        "ac": ["air conditioning", "a/c", "central air", "ac", "climate control"],
-        "pool": ["pool", "swimming"],
-        "sauna_hot_tub": ["sauna", "hot tub", "spa", "steam room"],
-        "gym": ["gym", "fitness", "exercise", "workout"],
-        "package_lockers": ["package", "parcel", "locker", "mailroom"]
-    }
+    # One lowercase scan over all amenities; keywords never contain "\n",
+    # so matches can't span two amenity strings.
+    blob = "\n".join(raw_amenities).lower()
+
+    if AHOCORASICK_AVAILABLE:
+        classified = set()
+        for _, amenity_keys in _AMENITY_MATCHER.iter(blob):
+            classified.update(amenity_keys)
+    else:
+        classified = {key for key, pattern in _AMENITY_MATCHER.items() if pattern.search(blob)}
 
-    for amenity_key, keywords in keyword_map.items():
-        for raw in raw_amenities:
-            if any(kw in raw.lower() for kw in keywords):
-                classified.append(amenity_key)
-                break
+    return list(classified)
 
-    return list(set(classified))
+
+# Matterport or other tour hosts, matched case-insensitively in one search
+TOUR_URL_RE = re.compile(
+    r'matterport\.com|my\.matterport|tour\.realync|3dtour|virtual-tour|virtualtour', re.IGNORECASE)
 
 
 def extract_3d_tour(soup):
     """Extract 3D tour link if available."""
     # Look for Matterport or other tour links
-    tour_patterns = [
-        "matterport.com",
-        "my.matterport",
-        "tour.realync",
-        "3dtour",
-        "virtual-tour",
-        "virtualtour"
-    ]
-
-    for link in soup.find_all("a", href=True):
-        href = link["href"].lower()
-        if any(pattern in href for pattern in tour_patterns):
-            return link["href"]
+    link = soup.find("a", href=TOUR_URL_RE)
+    if link:
+        return link["href"]
 
     # Check iframes too
-    for iframe in soup.find_all("iframe", src=True):
-        src = iframe["src"].lower()
-        if any(pattern in src for pattern in tour_patterns):
-            return iframe["src"]
+    iframe = soup.find("iframe", src=TOUR_URL_RE)
+    if iframe:
+        return iframe["src"]
 
     return None
 
@@ -401,31 +464,67 @@ def get_apartment_data(url=None):
 # SAVE/LOAD APARTMENTS
 # ============================================
 
-def save_apartment(apartment, filename="apartments.json"):
-    """Save apartment to JSON file."""
+def migrate_legacy_json(filename):
+    """
+    Saves used to go to one JSON array in apartments.json. If filename
+    (apartments.jsonl) doesn't exist yet but the legacy file does, copies
+    its apartments over once. The legacy file is left in place.
+    """
+    legacy = filename[:-1]  # "apartments.jsonl" -> "apartments.json"
+    if not filename.endswith(".jsonl") or os.path.exists(filename) or not os.path.exists(legacy):
+        return
     try:
-        with open(filename, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-
-    data.append(apartment)
+        with open(legacy, "r") as f:
+            apartments = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️  Could not read {legacy}: {e}")
+        return
 
     with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+        for apartment in apartments:
+            f.write(json.dumps(apartment, separators=(",", ":")) + "\n")
+    print(f"📦 Moved {len(apartments)} saved apartment(s) from {legacy} to {filename}")
 
-    print(f"\n💾 Saved! You now have {len(data)} apartment(s) on file.")
 
+def save_apartment(apartment, filename="apartments.jsonl"):
+    """Append apartment to a JSON Lines file (one apartment per line)."""
+    migrate_legacy_json(filename)
+    with open(filename, "a") as f:
+        f.write(json.dumps(apartment, separators=(",", ":")) + "\n")
 
-def load_apartments(filename="apartments.json"):
-    """Load all saved apartments."""
+    print(f"\n💾 Saved to {filename}!")
+
+
+def load_apartments(filename="apartments.jsonl"):
+    """Load all saved apartments (JSON Lines, or a legacy .json array)."""
+    migrate_legacy_json(filename)
     try:
         with open(filename, "r") as f:
-            return json.load(f)
+            if filename.endswith(".json"):
+                return json.load(f)
+
+            apartments = []
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    apartments.append(json.loads(line))
+                except json.JSONDecodeError:
+                    print(f"⚠️  Skipping unreadable line {line_no} in {filename}")
+            return apartments
     except (FileNotFoundError, json.JSONDecodeError):
         return []
 
 
+def export_apartments_json(filename="apartments.json", source="apartments.jsonl"):
+    """One-shot dump of every saved apartment to a pretty-printed JSON array."""
+    data = load_apartments(source)
+    with open(filename, "w") as f:
+        json.dump(data, f, indent=2)
+
+    print(f"\n💾 Exported {len(data)} apartment(s) to {filename}")
+
+
 # ============================================
 # EXAMPLE USAGE
 # ============================================
@@ -0,0 +1,61 @@
+# apartment_store.py
+# Scored apartments saved by the server, in SQLite so they survive restarts
+# and are shared by every gunicorn worker
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+STORE_DB = os.environ.get("APARTMENT_DB", os.path.expanduser("~/.apartment_scorer_apartments.sqlite"))
+
+_conn = None
+_lock = threading.Lock()  # One connection shared by every thread
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(STORE_DB, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")  # Readers don't wait on a writing worker
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS apartments (id TEXT PRIMARY KEY, rent INTEGER, lat REAL, lon REAL, "
+            "bedrooms REAL, bathrooms REAL, sqft INTEGER, data TEXT, created_at REAL)")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_rent ON apartments (rent)")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_geo ON apartments (lat, lon)")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_beds ON apartments (bedrooms, bathrooms)")
+        _conn.commit()
+    return _conn
+
+
+def save_apartments(apartments):
+    """Stores scored apartment dicts (each with an "id"), replacing any with the same id."""
+    now = time.time()
+    rows = [(apt["id"], apt.get("rent"), apt.get("lat"), apt.get("lon"), apt.get("bedrooms"),
+             apt.get("bathrooms"), apt.get("sqft"), json.dumps(apt), now) for apt in apartments]
+    with _lock:
+        conn = _connection()
+        conn.executemany(
+            "INSERT OR REPLACE INTO apartments (id, rent, lat, lon, bedrooms, bathrooms, sqft, data, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+
+
+def list_apartments():
+    """Every stored apartment, in the order they were scored."""
+    with _lock:
+        rows = _connection().execute("SELECT data FROM apartments ORDER BY created_at, rowid").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def delete_apartment(apt_id):
+    with _lock:
+        conn = _connection()
+        conn.execute("DELETE FROM apartments WHERE id = ?", (apt_id,))
+        conn.commit()
+
+
+def count_apartments():
+    with _lock:
+        return _connection().execute("SELECT COUNT(*) FROM apartments").fetchone()[0]
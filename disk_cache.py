@@ -0,0 +1,153 @@
+# disk_cache.py
+# Persistent SQLite cache for Nominatim/Overpass results (shared by the CLI and server)
+
+import os
+import re
+import time
+import pickle
+import sqlite3
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+
+CACHE_DB = os.path.expanduser("~/.apartment_scorer_cache.sqlite")
+DEFAULT_TTL_SECONDS = 30 * 86400  # 30 days
+USE_CACHE = True  # Set False (or pass --no-cache) to always hit the APIs
+
+MEMORY_ITEMS = 256  # Most recent entries also kept in-process (no SQLite read)
+
+_conn = None
+_lock = threading.Lock()  # One connection shared by every thread
+_memory = OrderedDict()  # hashed key -> (ts, value), least recently used first
+
+
+def _remember(hashed, ts, value):
+    _memory[hashed] = (ts, value)
+    _memory.move_to_end(hashed)
+    if len(_memory) > MEMORY_ITEMS:
+        _memory.popitem(last=False)
+
+
+def _connection():
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_DB, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, ts INTEGER, payload BLOB)")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, "
+            "ts INTEGER, payload BLOB)")
+        _conn.commit()
+    return _conn
+
+
+def _hash_key(key):
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def cache_get(key, ttl=DEFAULT_TTL_SECONDS):
+    """Returns the cached value for key, or None if missing/expired."""
+    if not USE_CACHE:
+        return None
+    hashed = _hash_key(key)
+    try:
+        with _lock:
+            entry = _memory.get(hashed)
+            if entry:
+                _memory.move_to_end(hashed)
+            else:
+                row = _connection().execute(
+                    "SELECT ts, payload FROM cache WHERE key = ?", (hashed,)).fetchone()
+                if row:
+                    entry = (row[0], pickle.loads(row[1]))
+                    _remember(hashed, *entry)
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not read cache: {e}")
+        return None
+    if entry and time.time() - entry[0] < ttl:
+        return entry[1]
+    return None
+
+
+def cache_set(key, value):
+    if not USE_CACHE:
+        return
+    hashed = _hash_key(key)
+    ts = int(time.time())
+    try:
+        with _lock:
+            _remember(hashed, ts, value)
+            conn = _connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, ts, payload) VALUES (?, ?, ?)",
+                (hashed, ts, pickle.dumps(value, protocol=5)))
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not write cache: {e}")
+
+
+def page_cache_get(url):
+    """
+    Returns (etag, last_modified, parsed, ts) saved for a scraped page, or None.
+    Pages don't expire here - callers decide from ts whether to re-check the
+    validators with the site.
+    """
+    if not USE_CACHE:
+        return None
+    try:
+        with _lock:
+            row = _connection().execute(
+                "SELECT etag, last_modified, payload, ts FROM pages WHERE url = ?", (url,)).fetchone()
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not read cache: {e}")
+        return None
+    if row:
+        return row[0], row[1], pickle.loads(row[2]), row[3]
+    return None
+
+
+def page_cache_set(url, etag, last_modified, parsed):
+    if not USE_CACHE:
+        return
+    try:
+        with _lock:
+            conn = _connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, ts, payload) VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, int(time.time()), pickle.dumps(parsed, protocol=5)))
+            conn.commit()
+    except sqlite3.Error as e:
+        print(f"⚠️  Could not write cache: {e}")
+
+
+def disk_cache(key, ttl=DEFAULT_TTL_SECONDS, prefix=None):
+    """
+    Decorator: caches fn(*args) under "<prefix>:<key(*args)>" (prefix
+    defaults to the function's name).
+    Empty results (None, [], {}) are not stored - they usually mean the
+    API call failed, so the next call should try again.
+    """
+    def decorator(fn):
+        name = prefix or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache_key = f"{name}:{key(*args, **kwargs)}"
+            cached = cache_get(cache_key, ttl)
+            if cached is not None:
+                return cached
+            result = fn(*args, **kwargs)
+            if result:
+                cache_set(cache_key, result)
+            return result
+        return wrapper
+    return decorator
+
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_address(address):
+    """Lowercase, strip punctuation, collapse whitespace (cache key form)."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", address.lower()).split())
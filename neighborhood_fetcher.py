@@ -1,12 +1,20 @@
 # neighborhood_fetcher.py
 # Phase 3: Auto-Fetch Neighborhood Data from Address
 
+import sys
 import time
 import math
 import json
+import heapq
+import sqlite3
+import threading
+from contextlib import closing
 from geopy.geocoders import Nominatim
 from geopy.distance import geodesic
 
+import disk_cache
+from disk_cache import cache_get, cache_set, normalize_address
+
 try:
     import overpy
     OVERPY_AVAILABLE = True
@@ -19,6 +27,34 @@ try:
 except ImportError:
     REQUESTS_AVAILABLE = False
 
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+# ============================================
+# API POLITENESS - Shared across threads
+# ============================================
+
+NOMINATIM_MIN_INTERVAL = 1.0  # Nominatim usage policy: max 1 request/second
+OVERPASS_MAX_CONCURRENT = 2  # overpass-api.de gives each IP ~2 query slots
+
+_nominatim_lock = threading.Lock()
+_nominatim_last_call = 0.0
+_overpass_slots = threading.BoundedSemaphore(OVERPASS_MAX_CONCURRENT)
+
+
+def _wait_for_nominatim():
+    """Blocks until this thread may send the next Nominatim request."""
+    global _nominatim_last_call
+    with _nominatim_lock:
+        wait = _nominatim_last_call + NOMINATIM_MIN_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _nominatim_last_call = time.monotonic()
+
 
 # ============================================
 # GEOCODING - Convert Address to Coordinates
@@ -29,16 +65,26 @@ def geocode_address(address):
     Convert a street address to latitude/longitude.
     Uses free Nominatim geocoder (OpenStreetMap).
     """
+    # Own prefix: the server caches a {lat, lon}-only shape in the same database
+    cache_key = "cli_geocode:" + normalize_address(address)
+    cached = cache_get(cache_key)
+    if cached:
+        print(f"📍 Found coordinates (cached): {cached['lat']}, {cached['lon']}")
+        return cached
+
     geolocator = Nominatim(user_agent="apartment_scorer_app")
     try:
+        _wait_for_nominatim()
         location = geolocator.geocode(address, timeout=10)
         if location:
             print(f"📍 Found coordinates: {location.latitude}, {location.longitude}")
-            return {
+            coords = {
                 "lat": location.latitude,
                 "lon": location.longitude,
                 "display_name": location.address
             }
+            cache_set(cache_key, coords)
+            return coords
         else:
             print(f"⚠️  Could not geocode address: {address}")
             return None
@@ -87,23 +133,119 @@ def query_osm_nearby(lat, lon, radius_meters, tags):
     tags = dict like {"amenity": "restaurant"}
     Returns list of places with name and distance.
     """
+    return query_osm_multi(lat, lon, {"places": (radius_meters, tags)})["places"]
+
+
+def query_osm_multi(lat, lon, groups):
+    """
+    Query OpenStreetMap for several POI categories in a single Overpass call.
+    groups = dict like {"restaurant": (2500, {"amenity": "restaurant"}), ...}
+    Returns {group name: list of places sorted by distance}.
+    """
+    # Nodes are cached per ~100m cell; distances are recomputed for this origin
+    filters = sorted(
+        (radius, tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in tags.items())))
+        for radius, tags in groups.values()
+    )
+    cache_key = f"osm:{round(lat, 3)}:{round(lon, 3)}:{filters}"
+    nodes = cache_get(cache_key)
+    if nodes is None:
+        nodes = _fetch_osm_nodes(lat, lon, groups.values())
+        if nodes is None:
+            return {name: [] for name in groups}
+        cache_set(cache_key, nodes)
+
+    # Nodes in nearest-first order, so every group list comes out sorted
+    distances = haversine_miles_many(lat, lon, nodes)
+    if NUMPY_AVAILABLE:
+        order = np.argsort(distances, kind="stable").tolist()
+        distances = distances.tolist()
+    else:
+        order = sorted(range(len(nodes)), key=distances.__getitem__)
+
+    # The union query returns nodes out to the widest radius; each group
+    # only keeps the ones inside its own
+    max_miles = {name: radius / METERS_PER_MILE for name, (radius, _) in groups.items()}
+
+    results = {name: [] for name in groups}
+    for i in order:
+        node = nodes[i]
+        place = {
+            "name": node["name"],
+            "distance_miles": distances[i],
+            "lat": node["lat"],
+            "lon": node["lon"],
+            "tags": node["tags"],
+            # Lowercased once here; dedupe/Costco checks downstream reuse it
+            "_name_lower": sys.intern(node["name"].lower())
+        }
+
+        # Dispatch to every group whose tag filter and radius this node matches
+        for name, (_, tags) in groups.items():
+            if distances[i] <= max_miles[name] and _tags_match(node["tags"], tags):
+                results[name].append(dict(place))
+
+    return results
+
+
+EARTH_RADIUS_MILES = 3958.8
+METERS_PER_MILE = 1609.34
+
+
+def haversine_miles_many(lat, lon, nodes):
+    """
+    Great-circle miles from (lat, lon) to each node, rounded to 0.01.
+    Haversine is within ~0.5% of geodesic - plenty for "how far is the bar".
+    """
+    if NUMPY_AVAILABLE:
+        lats = np.fromiter((n["lat"] for n in nodes), dtype=np.float64, count=len(nodes))
+        lons = np.fromiter((n["lon"] for n in nodes), dtype=np.float64, count=len(nodes))
+        dlat = np.radians(lats - lat)
+        dlon = np.radians(lons - lon)
+        a = np.sin(dlat / 2) ** 2 + math.cos(math.radians(lat)) * np.cos(np.radians(lats)) * np.sin(dlon / 2) ** 2
+        return np.round(EARTH_RADIUS_MILES * 2 * np.arcsin(np.sqrt(a)), 2)
+
+    cos_lat = math.cos(math.radians(lat))
+    distances = []
+    for n in nodes:
+        dlat = math.radians(n["lat"] - lat)
+        dlon = math.radians(n["lon"] - lon)
+        a = math.sin(dlat / 2) ** 2 + cos_lat * math.cos(math.radians(n["lat"])) * math.sin(dlon / 2) ** 2
+        distances.append(round(EARTH_RADIUS_MILES * 2 * math.asin(math.sqrt(a)), 2))
+    return distances
+
+
+def _tags_match(node_tags, tags):
+    for key, value in tags.items():
+        values = value if isinstance(value, list) else [value]
+        if node_tags.get(key) in values:
+            return True
+    return False
+
+
+def _fetch_osm_nodes(lat, lon, filters):
+    """
+    Runs one Overpass query for the union of filters (radius, tags).
+    Returns a list of node dicts, or None on error.
+    """
     if not OVERPY_AVAILABLE:
         print("⚠️  overpy not installed. Skipping OSM query.")
-        return []
+        return None
 
     api = overpy.Overpass()
 
     # Build tag filter
     tag_filters = ""
-    for key, value in tags.items():
-        if isinstance(value, list):
-            for v in value:
-                tag_filters += f'node["{key}"="{v}"](around:{radius_meters},{lat},{lon});'
-        else:
-            tag_filters += f'node["{key}"="{value}"](around:{radius_meters},{lat},{lon});'
+    for radius_meters, tags in filters:
+        for key, value in tags.items():
+            if isinstance(value, list):
+                for v in value:
+                    tag_filters += f'node["{key}"="{v}"](around:{radius_meters},{lat},{lon});'
+            else:
+                tag_filters += f'node["{key}"="{value}"](around:{radius_meters},{lat},{lon});'
 
     query = f"""
-    [out:json][timeout:25];
+    [out:json][timeout:60];
     (
         {tag_filters}
     );
@@ -111,137 +253,148 @@ def query_osm_nearby(lat, lon, radius_meters, tags):
     """
 
     try:
-        result = api.query(query)
-        places = []
-        for node in result.nodes:
-            name = node.tags.get("name", "Unnamed")
-            distance_miles = geodesic(
-                (lat, lon),
-                (float(node.lat), float(node.lon))
-            ).miles
-
-            places.append({
-                "name": name,
-                "distance_miles": round(distance_miles, 2),
+        with _overpass_slots:
+            result = api.query(query)
+        return [
+            {
+                "name": node.tags.get("name", "Unnamed"),
                 "lat": float(node.lat),
                 "lon": float(node.lon),
                 "tags": dict(node.tags)
-            })
-
-        # Sort by distance
-        places.sort(key=lambda x: x["distance_miles"])
-        return places
+            }
+            for node in result.nodes
+        ]
 
     except Exception as e:
         print(f"⚠️  OSM query error: {e}")
-        return []
+        return None
 
 
 # ============================================
 # CATEGORY-SPECIFIC FETCHERS
 # ============================================
+# Each fetcher runs its own single Overpass query, or post-processes
+# `found`: results of one query_osm_multi() call that already covered
+# its groups (see fetch_all_neighborhood_data).
+
+def restaurant_groups(radius=2500):
+    return {
+        "restaurant": (radius, {"amenity": "restaurant"}),
+        # Also grab cafes for a fuller picture
+        "cafe": (radius, {"amenity": "cafe"}),
+    }
+
+
+def grocery_groups(radius=5000):
+    return {
+        "supermarket": (radius, {"shop": "supermarket"}),
+        # Also check for wholesale clubs (Costco, Sam's Club) - 10 mile radius
+        "wholesale": (16000, {"shop": "wholesale"}),
+    }
+
+
+def nightlife_groups(radius=3000):
+    return {
+        "bar": (radius, {"amenity": "bar"}),
+        "nightclub": (radius, {"amenity": "nightclub"}),
+        "bowling_alley": (radius, {"leisure": "bowling_alley"}),
+        "theatre": (radius, {"amenity": "theatre"}),
+        "cinema": (radius, {"amenity": "cinema"}),
+    }
+
 
-def fetch_restaurants(lat, lon, radius=2500):
+def transit_groups(radius=1000):
+    return {
+        "bus_stop": (radius, {"highway": "bus_stop"}),
+        "rail": (2000, {"railway": "station"}),
+    }
+
+
+def school_groups(radius=3000):
+    return {"school": (radius, {"amenity": "school"})}
+
+
+def public_fields(places):
+    """Drops the underscore-prefixed helper fields before places are returned/saved."""
+    return [{k: v for k, v in p.items() if not k.startswith("_")} for p in places]
+
+
+def fetch_restaurants(lat, lon, radius=2500, found=None):
     """Fetch nearby restaurants (within ~1.5 miles)."""
     print("🍽️  Searching for restaurants...")
-    places = query_osm_nearby(lat, lon, radius, {"amenity": "restaurant"})
+    if found is None:
+        found = query_osm_multi(lat, lon, restaurant_groups(radius))
 
-    # Also grab cafes and fast food for a fuller picture
-    cafes = query_osm_nearby(lat, lon, radius, {"amenity": "cafe"})
-    time.sleep(1)  # Be nice to the free API
-
-    all_dining = places + cafes
+    all_dining = found["restaurant"] + found["cafe"]
     all_dining.sort(key=lambda x: x["distance_miles"])
 
     print(f"   Found {len(all_dining)} dining options nearby")
     return all_dining
 
 
-def fetch_grocery(lat, lon, radius=5000):
+def fetch_grocery(lat, lon, radius=5000, found=None):
     """
     Fetch nearby grocery stores (within ~3 miles).
     Includes supermarkets + specific stores like Costco.
     """
     print("🛒 Searching for grocery stores...")
-    
-    # Get supermarkets
-    supermarkets = query_osm_nearby(lat, lon, radius, {"shop": "supermarket"})
-    time.sleep(1)
-
-    # Also check for wholesale clubs (Costco, Sam's Club)
-    wholesale = query_osm_nearby(lat, lon, 16000, {"shop": "wholesale"})  # 10 mile radius for Costco
-    time.sleep(1)
-
-    # Combine and deduplicate
-    all_grocery = supermarkets.copy()
-    
-    # Add wholesale that aren't already in the list
-    existing_names = {g["name"].lower() for g in all_grocery}
-    for store in wholesale:
-        if store["name"].lower() not in existing_names:
-            all_grocery.append(store)
-
-    all_grocery.sort(key=lambda x: x["distance_miles"])
-
-    # Flag Costco specifically
-    for store in all_grocery:
-        if "costco" in store["name"].lower():
+    if found is None:
+        found = query_osm_multi(lat, lon, grocery_groups(radius))
+    supermarkets = found["supermarket"]
+    wholesale = found["wholesale"]
+
+    # Skip wholesale clubs already listed as supermarkets
+    existing_names = {store["_name_lower"] for store in supermarkets}
+    extra = [store for store in wholesale if store["_name_lower"] not in existing_names]
+
+    # Both lists are already nearest-first, so merge instead of re-sorting
+    all_grocery = []
+    for store in heapq.merge(supermarkets, extra, key=lambda x: x["distance_miles"]):
+        name_lower = store["_name_lower"]
+        store["type"] = "wholesale" if "costco" in name_lower or "sam" in name_lower else "grocery"
+
+        # Flag Costco specifically
+        if "costco" in name_lower:
             print(f"   🎯 Costco found: {store['distance_miles']} miles away!")
+        all_grocery.append(store)
 
     print(f"   Found {len(all_grocery)} grocery options nearby")
     return all_grocery
 
 
-def fetch_nightlife(lat, lon, radius=3000):
+def fetch_nightlife(lat, lon, radius=3000, found=None):
     """Fetch nearby bars, nightclubs, entertainment."""
     print("🎶 Searching for nightlife...")
+    if found is None:
+        found = query_osm_multi(lat, lon, nightlife_groups(radius))
 
-    bars = query_osm_nearby(lat, lon, radius, {"amenity": "bar"})
-    time.sleep(1)
-
-    nightclubs = query_osm_nearby(lat, lon, radius, {"amenity": "nightclub"})
-    time.sleep(1)
+    all_nightlife = (found["bar"] + found["nightclub"] + found["bowling_alley"]
+                     + found["theatre"] + found["cinema"])
 
-    entertainment = query_osm_nearby(lat, lon, radius, {"leisure": "bowling_alley"})
-    time.sleep(1)
-
-    theatres = query_osm_nearby(lat, lon, radius, {"amenity": "theatre"})
-    time.sleep(1)
-
-    cinemas = query_osm_nearby(lat, lon, radius, {"amenity": "cinema"})
-
-    all_nightlife = bars + nightclubs + entertainment + theatres + cinemas
-
-    # Deduplicate by name
-    seen = set()
-    unique = []
+    # Deduplicate by name (first listing of each name wins)
+    by_name = {}
     for place in all_nightlife:
-        if place["name"].lower() not in seen:
-            seen.add(place["name"].lower())
-            unique.append(place)
+        by_name.setdefault(place["_name_lower"], place)
 
-    unique.sort(key=lambda x: x["distance_miles"])
+    unique = sorted(by_name.values(), key=lambda x: x["distance_miles"])
     print(f"   Found {len(unique)} nightlife/entertainment options nearby")
     return unique
 
 
-def fetch_transit(lat, lon, radius=1000):
+def fetch_transit(lat, lon, radius=1000, found=None):
     """Fetch nearby transit stops (within ~0.6 miles)."""
     print("🚌 Searching for transit...")
+    if found is None:
+        found = query_osm_multi(lat, lon, transit_groups(radius))
 
-    bus_stops = query_osm_nearby(lat, lon, radius, {"highway": "bus_stop"})
-    time.sleep(1)
-
-    rail = query_osm_nearby(lat, lon, 2000, {"railway": "station"})
-
-    all_transit = bus_stops + rail
+    all_transit = found["bus_stop"] + found["rail"]
     all_transit.sort(key=lambda x: x["distance_miles"])
 
     print(f"   Found {len(all_transit)} transit stops nearby")
     return all_transit
 
 
-def fetch_schools(lat, lon, radius=3000):
+def fetch_schools(lat, lon, radius=3000, found=None):
     """
     Fetch nearby schools.
     Note: OSM doesn't have ratings, so we return school names
@@ -249,8 +402,10 @@ def fetch_schools(lat, lon, radius=3000):
     For now, we estimate based on count and proximity.
     """
     print("🏫 Searching for schools...")
+    if found is None:
+        found = query_osm_multi(lat, lon, school_groups(radius))
 
-    schools = query_osm_nearby(lat, lon, radius, {"amenity": "school"})
+    schools = found["school"]
 
     print(f"   Found {len(schools)} schools nearby")
     return schools
@@ -321,21 +476,20 @@ def fetch_all_neighborhood_data(address):
 
     print(f"\n🔍 Scanning neighborhood...\n")
 
-    # Step 2: Fetch all data (with pauses to be nice to free APIs)
-    restaurants = fetch_restaurants(lat, lon)
-    time.sleep(2)
-
-    grocery = fetch_grocery(lat, lon)
-    time.sleep(2)
-
-    nightlife = fetch_nightlife(lat, lon)
-    time.sleep(2)
-
-    transit = fetch_transit(lat, lon)
-    time.sleep(2)
-
-    schools = fetch_schools(lat, lon)
-    time.sleep(1)
+    # Step 2: Fetch every POI category with a single Overpass query
+    found = query_osm_multi(lat, lon, {
+        **restaurant_groups(),
+        **grocery_groups(),
+        **nightlife_groups(),
+        **transit_groups(),
+        **school_groups(),
+    })
+
+    restaurants = fetch_restaurants(lat, lon, found=found)
+    grocery = fetch_grocery(lat, lon, found=found)
+    nightlife = fetch_nightlife(lat, lon, found=found)
+    transit = fetch_transit(lat, lon, found=found)
+    schools = fetch_schools(lat, lon, found=found)
 
     crime = fetch_crime_estimate(lat, lon)
 
@@ -356,28 +510,23 @@ def fetch_all_neighborhood_data(address):
         "coordinates": coords,
         "drive_minutes": drive_min,
         "transit_available": transit_level,
-        "transit_stops": transit,
+        "transit_stops": public_fields(transit),
 
         "restaurant_count": len(restaurants),
         "restaurant_avg_rating": None,  # OSM doesn't have ratings
-        "restaurants": restaurants[:20],  # Top 20 closest
+        "restaurants": public_fields(restaurants[:20]),  # Top 20 closest
 
         "grocery_stores": [
-            {
-                "name": g["name"],
-                "distance_miles": g["distance_miles"],
-                "type": "wholesale" if "costco" in g["name"].lower() 
-                        or "sam" in g["name"].lower() else "grocery"
-            }
+            {"name": g["name"], "distance_miles": g["distance_miles"], "type": g["type"]}
             for g in grocery
         ],
 
         "nightlife_count": len(nightlife),
         "nightlife_avg_rating": None,  # OSM doesn't have ratings
-        "nightlife": nightlife[:20],
+        "nightlife": public_fields(nightlife[:20]),
 
         "school_ratings": [],  # Will need GreatSchools API or manual input
-        "schools": schools[:10],
+        "schools": public_fields(schools[:10]),
 
         "crime_index": crime["crime_index"],
         "crime_source": crime["source"]
@@ -392,9 +541,9 @@ def fetch_all_neighborhood_data(address):
     print(f"  🍽️  Restaurants: {len(restaurants)} nearby")
     print(f"  🛒 Grocery: {len(grocery)} stores")
 
-    costco_list = [g for g in grocery if "costco" in g["name"].lower()]
-    if costco_list:
-        print(f"  🎯 Nearest Costco: {costco_list[0]['distance_miles']} mi")
+    nearest_costco = next((g for g in grocery if "costco" in g["_name_lower"]), None)
+    if nearest_costco:
+        print(f"  🎯 Nearest Costco: {nearest_costco['distance_miles']} mi")
     else:
         print(f"  🎯 Costco: None found within 10 miles")
 
@@ -406,22 +555,32 @@ def fetch_all_neighborhood_data(address):
     return neighborhood_data
 
 
-def save_neighborhood_data(address, data, filename="neighborhoods.json"):
-    """Cache neighborhood data so we don't re-fetch."""
-    try:
-        with open(filename, "r") as f:
-            cache = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        cache = {}
+NEIGHBORHOOD_DB = "neighborhoods.sqlite"
+
 
-    cache[address] = data
+def _open_neighborhood_db(filename):
+    conn = sqlite3.connect(filename)
+    conn.execute("CREATE TABLE IF NOT EXISTS nbhd (address TEXT PRIMARY KEY, data TEXT, ts INTEGER)")
+    return conn
 
-    with open(filename, "w") as f:
-        json.dump(cache, f, indent=2)
+
+def save_neighborhood_data(address, data, filename=NEIGHBORHOOD_DB):
+    """Cache neighborhood data so we don't re-fetch (one row per address)."""
+    with closing(_open_neighborhood_db(filename)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO nbhd (address, data, ts) VALUES (?, ?, ?)",
+            (address, json.dumps(data), int(time.time())))
 
     print(f"💾 Neighborhood data cached for: {address}")
 
 
+def load_neighborhood_data(address, filename=NEIGHBORHOOD_DB):
+    """Returns the saved neighborhood data for address, or None."""
+    with closing(_open_neighborhood_db(filename)) as conn:
+        row = conn.execute("SELECT data FROM nbhd WHERE address = ?", (address,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
 # ============================================
 # SCHOOL RATING MANUAL INPUT
 # ============================================
@@ -455,6 +614,9 @@ def input_school_ratings(schools):
 # ============================================
 
 if __name__ == "__main__":
+    if "--no-cache" in sys.argv:
+        disk_cache.USE_CACHE = False
+
     print("\n🏢 APARTMENT SCORER - Neighborhood Analysis")
     print("=" * 50)
 
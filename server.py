@@ -2,16 +2,74 @@
 # Backend API - Apartment Scorer (apartments.com optimized)
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
+import os
 import re
-import time
+import json
 import math
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from disk_cache import disk_cache, normalize_address, page_cache_get, page_cache_set
+import apartment_store
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401 - only needed as a BeautifulSoup backend
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+class OrjsonProvider(DefaultJSONProvider):
+    """jsonify / request.json through orjson; keys stay sorted like Flask's default."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default,
+                            option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+if ORJSON_AVAILABLE:
+    app.json = OrjsonProvider(app)
 CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+# One pooled keep-alive session for every outbound call (skips a TLS
+# handshake per request). Overpass mirrors get their own no-retry adapter
+# (see OVERPASS_MIRRORS).
+SESSION = requests.Session()
+SESSION.headers.update({"User-Agent": "apartment-scorer-app"})
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=16, pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+))
+
 
 # ============================================
 # USER SETTINGS
@@ -44,14 +102,145 @@ AMENITY_KEYWORDS = {
                          "package concierge", "package receiving", "amazon locker"]
 }
 
+# One bit per amenity key; classification and scoring work on these masks
+AMENITY_BITS = {key: 1 << i for i, key in enumerate(AMENITY_KEYWORDS)}
+ALL_AMENITIES = (1 << len(AMENITY_BITS)) - 1
+
+
+def amenity_mask(amenities):
+    """Packs a list of amenity keys into an AMENITY_BITS mask (unknown keys are ignored)."""
+    mask = 0
+    for amenity in amenities:
+        mask |= AMENITY_BITS.get(amenity, 0)
+    return mask
+
+
+# USER_SETTINGS' amenity lists, packed once for the scorers
+NECESSITY_MASK = amenity_mask(USER_SETTINGS["necessities"])
+NICE_TO_HAVE_MASK = amenity_mask(USER_SETTINGS["nice_to_haves"])
+NICE_TO_HAVE_TOTAL = NICE_TO_HAVE_MASK.bit_count()
+
+
+def amenity_names(mask):
+    """Unpacks a mask back into amenity keys, in AMENITY_KEYWORDS order."""
+    return [key for key, bit in AMENITY_BITS.items() if mask & bit]
+
+
+def _build_amenity_matcher():
+    """
+    Builds the keyword matcher once at import: a single Aho-Corasick
+    automaton (keyword -> mask of amenity bits) when pyahocorasick is
+    installed, otherwise one compiled alternation regex per amenity bit.
+    """
+    if AHOCORASICK_AVAILABLE:
+        bits_by_keyword = {}
+        for amenity_key, keywords in AMENITY_KEYWORDS.items():
+            for kw in keywords:
+                bits_by_keyword[kw] = bits_by_keyword.get(kw, 0) | AMENITY_BITS[amenity_key]
+
+        automaton = ahocorasick.Automaton()
+        for kw, bits in bits_by_keyword.items():
+            automaton.add_word(kw, bits)
+        automaton.make_automaton()
+        return automaton
+
+    return {
+        AMENITY_BITS[amenity_key]: re.compile("|".join(map(re.escape, keywords)))
+        for amenity_key, keywords in AMENITY_KEYWORDS.items()
+    }
+
+
+AMENITY_MATCHER = _build_amenity_matcher()
+
 
 # ============================================
 # APARTMENTS.COM SCRAPER
 # ============================================
 
-def scrape_apartments_com(url):
-    """Scrape an apartments.com listing page."""
+# Compiled once; the floor plan parser runs these on every span of every plan
+PRICE_RE = re.compile(r'\$([\d,]+)')
+# Beds / baths / sqft / deposit in one pass over a details string
+PLAN_DETAILS_RE = re.compile(
+    r'(?P<bedrooms>\d+)\s*bed'
+    r'|(?P<bathrooms>\d+(?:\.\d+)?)\s*bath'
+    r'|(?P<sqft>[\d,]+)\s*sq\s*ft'
+    r'|\$(?P<deposit>[\d,]+)\s*deposit'
+)
+JSON_PLAN_RE = re.compile(
+    r'"ModelName":"([^"]*)".*?"Beds":(\d+).*?"Baths":([\d.]+).*?"MinSquareFeet":(\d+).*?"MinTotalMonthlyPrice":([\d.]+)')
+# Bounded runs: a page full of "123 Main St ..." fragments with no city/zip
+# can't backtrack quadratically through the whole text
+US_ADDRESS_RE = re.compile(
+    r'(\d+\s+[A-Za-z\s]{1,60}?(?:St|Street|Ave|Avenue|Blvd|Boulevard|Dr|Drive|Rd|Road|Way|Ln|Lane)'
+    r'[^,]{0,60},\s*[A-Za-z\s]{1,40},\s*[A-Z]{2}\s*\d{5})')
+# Every address ends in "ST 12345"; pages without one skip the address regex
+US_STATE_ZIP_RE = re.compile(r'[A-Z]{2}\s*\d{5}')
+
+# Listing pages run 1-2 MB; anything past this is cut off rather than
+# buffered (pages are fetched with stream=True)
+MAX_PAGE_BYTES = 5_000_000
+
+
+def declared_charset(headers):
+    """
+    The charset named in Content-Type, or None. (requests reports ISO-8859-1
+    for any text/* response without one, so response.encoding can't tell.)
+    """
+    if "charset=" not in headers.get("Content-Type", "").lower():
+        return None
+    return requests.utils.get_encoding_from_headers(headers)
+
+
+def page_html(response):
+    """
+    Response body as text, read up to MAX_PAGE_BYTES. Pages without a
+    declared charset are read as UTF-8, not ISO-8859-1.
+    """
+    body = bytearray()
+    try:
+        for chunk in response.iter_content(65536):
+            body += chunk
+            if len(body) >= MAX_PAGE_BYTES:
+                break
+    finally:
+        response.close()
+    try:
+        return body.decode(declared_charset(response.headers) or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+# Re-scoring a listing within this window reuses the last parse without
+# contacting apartments.com at all
+PAGE_FRESH_SECONDS = 6 * 3600
+
+
+def cached_page(data, on_address=None):
+    if on_address and data["address"]:
+        on_address(data["address"])
+    return data
+
+
+def scrape_apartments_com(url, on_address=None):
+    """
+    Scrape an apartments.com listing page.
+    on_address(address) is called as soon as the address is parsed, so the
+    caller can start the neighborhood lookup while the rest is extracted.
+    Recently scraped pages, and unchanged ones (304 on ETag/Last-Modified),
+    reuse the last parse.
+    """
     
+    # Validators from the last time this page was parsed
+    cached = page_cache_get(url)
+    if cached and time.time() - cached[3] < PAGE_FRESH_SECONDS:
+        return cached_page(cached[2], on_address)
+    validators = {}
+    if cached:
+        if cached[0]:
+            validators["If-None-Match"] = cached[0]
+        if cached[1]:
+            validators["If-Modified-Since"] = cached[1]
+
     user_agents = [
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
@@ -68,21 +257,33 @@ def scrape_apartments_com(url):
             "Sec-Fetch-Site": "none",
             "Sec-Fetch-User": "?1",
             "Upgrade-Insecure-Requests": "1",
+            **validators,
         }
 
         try:
-            response = requests.get(url, headers=headers, timeout=20)
-            if response.status_code == 200:
+            response = SESSION.get(url, headers=headers, timeout=20, stream=True)
+            if response.status_code == 200 or (cached and response.status_code == 304):
                 break
+            response.close()
         except Exception:
             continue
     else:
         return {"error": "Blocked by apartments.com (403)", "scraped": False}
 
+    if cached and response.status_code == 304:
+        response.close()
+        page_cache_set(url, cached[0], cached[1], cached[2])  # Fresh for another window
+        return cached_page(cached[2], on_address)
+
     if response.status_code != 200:
+        response.close()
         return {"error": f"Status {response.status_code}", "scraped": False}
 
-    soup = BeautifulSoup(response.text, "html.parser")
+    try:
+        html = page_html(response)
+    except requests.RequestException as e:
+        return {"error": f"Could not read page: {e}", "scraped": False}
+    soup = BeautifulSoup(html, HTML_PARSER)
     page_text_lower = soup.get_text(separator=" ").lower()
 
     data = {
@@ -101,11 +302,17 @@ def scrape_apartments_com(url):
         data["name"] = name_el.text.strip()
 
     data["address"] = extract_address_adc(soup)
+    if on_address and data["address"]:
+        on_address(data["address"])
     data["floor_plans"] = extract_floor_plans_adc(soup)
     data["amenities_raw"] = extract_amenities_adc(soup)
     data["amenities_classified"] = classify_amenities_adc(data["amenities_raw"], page_text_lower)
     data["tour_3d"] = extract_tour_adc(soup)
 
+    # Bot-challenge and block pages come back 200 but parse to nothing;
+    # caching one would serve it for the whole PAGE_FRESH_SECONDS window
+    if data["name"] or data["address"] or data["floor_plans"]:
+        page_cache_set(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), data)
     return data
 
 
@@ -166,6 +373,22 @@ def extract_address_adc(soup):
 
     return None
 
+def parse_plan_details(text, plan, fields=("bedrooms", "bathrooms", "sqft", "deposit")):
+    """Sets plan fields found in text; the first match of each field wins."""
+    seen = set()
+    for match in PLAN_DETAILS_RE.finditer(text):
+        field = match.lastgroup
+        if field in seen or field not in fields:
+            continue
+        seen.add(field)
+        value = match.group(field)
+        if field == "bathrooms":
+            val = float(value)
+            plan[field] = int(val) if val == int(val) else val
+        else:
+            plan[field] = int(value.replace(",", ""))
+
+
 def extract_floor_plans_adc(soup):
     """Extract all floor plans from apartments.com pricing grid."""
     plans = []
@@ -193,7 +416,7 @@ def extract_floor_plans_adc(soup):
         rent_label = wrapper.select_one("span.rentLabel")
         if rent_label:
             rent_text = rent_label.get_text(separator=" ").strip()
-            rent_match = re.search(r'\$([\d,]+)', rent_text)
+            rent_match = PRICE_RE.search(rent_text)
             if rent_match:
                 plan["rent"] = int(rent_match.group(1).replace(",", ""))
 
@@ -201,39 +424,13 @@ def extract_floor_plans_adc(soup):
         if details:
             spans = details.find_all("span")
             for span in spans:
-                text = span.text.strip().lower()
-
-                bed_match = re.search(r'(\d+)\s*bed', text)
-                if bed_match:
-                    plan["bedrooms"] = int(bed_match.group(1))
-
-                bath_match = re.search(r'(\d+(?:\.\d+)?)\s*bath', text)
-                if bath_match:
-                    val = float(bath_match.group(1))
-                    plan["bathrooms"] = int(val) if val == int(val) else val
-
-                sqft_match = re.search(r'([\d,]+)\s*sq\s*ft', text)
-                if sqft_match:
-                    plan["sqft"] = int(sqft_match.group(1).replace(",", ""))
-
-                deposit_match = re.search(r'\$([\d,]+)\s*deposit', text)
-                if deposit_match:
-                    plan["deposit"] = int(deposit_match.group(1).replace(",", ""))
+                parse_plan_details(span.text.strip().lower(), plan)
 
         if not plan["bedrooms"]:
             details_label = wrapper.select_one("span.detailsLabel")
             if details_label:
-                text = details_label.get_text(separator=" ").lower()
-                bed_match = re.search(r'(\d+)\s*bed', text)
-                if bed_match:
-                    plan["bedrooms"] = int(bed_match.group(1))
-                bath_match = re.search(r'(\d+(?:\.\d+)?)\s*bath', text)
-                if bath_match:
-                    val = float(bath_match.group(1))
-                    plan["bathrooms"] = int(val) if val == int(val) else val
-                sqft_match = re.search(r'([\d,]+)\s*sq\s*ft', text)
-                if sqft_match:
-                    plan["sqft"] = int(sqft_match.group(1).replace(",", ""))
+                parse_plan_details(details_label.get_text(separator=" ").lower(), plan,
+                                   fields=("bedrooms", "bathrooms", "sqft"))
 
         unit_rows = wrapper.select("li.unitContainer") or wrapper.select("div.unitContainer")
         for unit_row in unit_rows:
@@ -245,7 +442,7 @@ def extract_floor_plans_adc(soup):
             if unit_num:
                 unit["unit_number"] = unit_num.text.strip()
 
-            unit_rent = re.search(r'\$([\d,]+)', unit_text)
+            unit_rent = PRICE_RE.search(unit_text)
             if unit_rent:
                 unit["rent"] = int(unit_rent.group(1).replace(",", ""))
 
@@ -270,19 +467,52 @@ def extract_floor_plans_adc(soup):
     return plans
 
 
+JSON_PLAN_KEYS = ("ModelName", "Beds", "Baths", "MinSquareFeet", "MinTotalMonthlyPrice")
+JSON_START_RE = re.compile(r'[{\[]')
+
+
+def json_plan_models(text):
+    """
+    Decodes the JSON value embedded in a script (e.g. after "window.x = ")
+    and yields its (ModelName, Beds, Baths, MinSquareFeet, MinTotalMonthlyPrice)
+    tuples in document order. Yields nothing if the script isn't JSON.
+    """
+    start = JSON_START_RE.search(text)
+    if not start:
+        return
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text, start.start())
+    except (ValueError, RecursionError):
+        return
+
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if all(key in node for key in JSON_PLAN_KEYS):
+                yield tuple(node[key] for key in JSON_PLAN_KEYS)
+            children = node.values()
+        elif isinstance(node, list):
+            children = node
+        else:
+            continue
+        stack.extend(child for child in reversed(list(children)) if isinstance(child, (dict, list)))
+
+
 def extract_plans_from_json(soup):
-    """Fallback: try to find floor plan data in embedded JSON."""
+    """
+    Fallback: try to find floor plan data in embedded JSON. The script is
+    decoded as JSON when possible; the field regex is only for scripts that
+    aren't plain JSON (e.g. JS with the data inlined).
+    """
     plans = []
     scripts = soup.find_all("script")
     for script in scripts:
         text = script.string or ""
         if "MinTotalMonthlyPrice" in text or "MaxTotalMonthlyPrice" in text:
-            try:
-                matches = re.findall(
-                    r'"ModelName":"([^"]*)".*?"Beds":(\d+).*?"Baths":([\d.]+).*?"MinSquareFeet":(\d+).*?"MinTotalMonthlyPrice":([\d.]+)',
-                    text
-                )
-                for name, beds, baths, sqft, price in matches:
+            matches = list(json_plan_models(text)) or JSON_PLAN_RE.findall(text)
+            for name, beds, baths, sqft, price in matches:
+                try:
                     plans.append({
                         "plan_name": name,
                         "bedrooms": int(beds),
@@ -291,66 +521,85 @@ def extract_plans_from_json(soup):
                         "rent": int(float(price)),
                         "units": []
                     })
-            except Exception:
-                pass
+                except (TypeError, ValueError):
+                    continue  # e.g. a model with a null price
     return plans
 
 
 def extract_amenities_adc(soup):
     """Extract amenity list from apartments.com."""
     amenities = []
+    seen = set()  # Mirrors amenities for O(1) "already have it?" checks
 
     for li in soup.select("li.specInfo.uniqueAmenity"):
         span = li.find("span")
         if span:
-            amenities.append(span.text.strip())
+            text = span.text.strip()
+            amenities.append(text)
+            seen.add(text)
 
     for li in soup.select("li.specInfo"):
         span = li.find("span")
         if span:
             text = span.text.strip()
-            if text and text not in amenities:
+            if text and text not in seen:
                 amenities.append(text)
+                seen.add(text)
 
     for section in soup.select("div.specList"):
         for li in section.find_all("li"):
             text = li.get_text(separator=" ").strip()
-            if text and text not in amenities and len(text) < 100:
+            if text and text not in seen and len(text) < 100:
                 amenities.append(text)
+                seen.add(text)
 
     return amenities
 
 
-def classify_amenities_adc(raw_amenities, page_text=""):
-    """Classify raw amenity strings into our scoring categories."""
-    classified = []
-    combined = " ".join(raw_amenities).lower() + " " + page_text.lower()
+def classify_amenities_adc(raw_amenities, page_text_lower=""):
+    """
+    Classify raw amenity strings into our scoring categories.
+    page_text_lower must already be lowercased (callers lower the page once).
+    """
+    combined = " ".join(raw_amenities).lower() + " " + page_text_lower
+
+    # One pass over the page for every keyword at once
+    mask = 0
+    if AHOCORASICK_AVAILABLE:
+        for _, bits in AMENITY_MATCHER.iter(combined):
+            mask |= bits
+            if mask == ALL_AMENITIES:
+                break  # Everything found, no need to scan the rest
+    else:
+        for bit, pattern in AMENITY_MATCHER.items():
+            if pattern.search(combined):
+                mask |= bit
+
+    return amenity_names(mask)
 
-    for key, keywords in AMENITY_KEYWORDS.items():
-        if any(kw in combined for kw in keywords):
-            classified.append(key)
 
-    return list(set(classified))
+# Case-insensitive keyword alternations for the tour hunt (one search per string)
+TOUR_HREF_RE = re.compile(r'matterport|3d-tour|virtual-tour|tour\.realync', re.IGNORECASE)
+TOUR_LINK_TEXT_RE = re.compile(r'3d tour|virtual tour|take a tour', re.IGNORECASE)
+TOUR_IFRAME_RE = re.compile(r'matterport|tour|3d', re.IGNORECASE)
+TOUR_BUTTON_RE = re.compile(r'tour|3d', re.IGNORECASE)
 
 
 def extract_tour_adc(soup):
     """Find 3D tour or virtual tour links."""
     for link in soup.find_all("a", href=True):
-        href = link["href"].lower()
-        text = link.get_text().lower()
-        if any(kw in href for kw in ["matterport", "3d-tour", "virtual-tour", "tour.realync"]):
+        if TOUR_HREF_RE.search(link["href"]):
             return link["href"]
-        if any(kw in text for kw in ["3d tour", "virtual tour", "take a tour"]):
+        # Only build the link text when the href didn't already match
+        if TOUR_LINK_TEXT_RE.search(link.get_text()):
             return link["href"]
 
-    for iframe in soup.find_all("iframe", src=True):
-        src = iframe["src"].lower()
-        if any(kw in src for kw in ["matterport", "tour", "3d"]):
-            return iframe["src"]
+    iframe = soup.find("iframe", src=TOUR_IFRAME_RE)
+    if iframe:
+        return iframe["src"]
 
     for btn in soup.select("button"):
-        text = btn.get_text().lower()
-        if "tour" in text or "3d" in text:
+        if TOUR_BUTTON_RE.search(btn.get_text()):
             onclick = btn.get("onclick", "") or btn.get("data-url", "")
             if onclick:
                 return onclick
@@ -369,11 +618,12 @@ def scrape_generic(url):
                        "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
     }
     try:
-        response = requests.get(url, headers=headers, timeout=15)
+        response = SESSION.get(url, headers=headers, timeout=15, stream=True)
         if response.status_code != 200:
+            response.close()
             return {"error": f"Status {response.status_code}", "scraped": False}
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = BeautifulSoup(page_html(response), HTML_PARSER)
         page_text = soup.get_text(separator=" ")
         page_text_lower = page_text.lower()
 
@@ -383,10 +633,7 @@ def scrape_generic(url):
             name = title.text.strip().split("|")[0].split("-")[0].strip()
 
         address = None
-        addr_match = re.search(
-            r'(\d+\s+[A-Za-z\s]+(?:St|Street|Ave|Avenue|Blvd|Boulevard|Dr|Drive|Rd|Road|Way|Ln|Lane)[^,]*,\s*[A-Za-z\s]+,\s*[A-Z]{2}\s*\d{5})',
-            page_text
-        )
+        addr_match = US_STATE_ZIP_RE.search(page_text) and US_ADDRESS_RE.search(page_text)
         if addr_match:
             address = addr_match.group(1).strip()
 
@@ -404,10 +651,10 @@ def scrape_generic(url):
         return {"error": str(e), "scraped": False}
 
 
-def scrape_apartment(url):
+def scrape_apartment(url, on_address=None):
     """Route to the right scraper based on URL."""
     if "apartments.com" in url.lower():
-        return scrape_apartments_com(url)
+        return scrape_apartments_com(url, on_address)
     else:
         return scrape_generic(url)
 
@@ -416,15 +663,28 @@ def scrape_apartment(url):
 # NEIGHBORHOOD DATA
 # ============================================
 
+def parse_json(resp):
+    """Decodes a JSON response body with orjson when available."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(resp.content)
+    return resp.json()
+
+
+# Point at a self-hosted Nominatim for big batches (same /search API)
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+
+
+# The CLI caches {lat, lon, display_name} under "cli_geocode:" in the same
+# database; this entry is only {lat, lon}
+@disk_cache(key=normalize_address, prefix="server_geocode")
 def geocode(address):
     try:
-        resp = requests.get(
-            "https://nominatim.openstreetmap.org/search",
+        resp = SESSION.get(
+            NOMINATIM_URL,
             params={"q": address, "format": "json", "limit": 1},
-            headers={"User-Agent": "apartment-scorer-app"},
-            timeout=10
+            timeout=15
         )
-        results = resp.json()
+        results = parse_json(resp)
         if results:
             return {"lat": float(results[0]["lat"]), "lon": float(results[0]["lon"])}
     except Exception as e:
@@ -440,44 +700,168 @@ def haversine_miles(lat1, lon1, lat2, lon2):
     return R * 2 * math.asin(math.sqrt(a))
 
 
-def overpass_combined(lat, lon):
-    """Single combined query for all nearby amenities."""
-    query = f"""[out:json][timeout:20];
-    (
-        node["amenity"="restaurant"](around:2500,{lat},{lon});
-        node["amenity"="cafe"](around:2500,{lat},{lon});
-        node["amenity"="bar"](around:3000,{lat},{lon});
-        node["amenity"="nightclub"](around:3000,{lat},{lon});
-        node["amenity"="cinema"](around:3000,{lat},{lon});
-        node["amenity"="school"](around:3000,{lat},{lon});
-        node["shop"="supermarket"](around:5000,{lat},{lon});
-        node["highway"="bus_stop"](around:1000,{lat},{lon});
-        node["railway"="station"](around:2000,{lat},{lon});
-    );
-    out body;"""
-    try:
-        resp = requests.post("https://overpass-api.de/api/interpreter", data={"data": query}, timeout=25)
-        return resp.json().get("elements", [])
-    except Exception as e:
-        print(f"Overpass error: {e}")
-        return []
+# The commute target never changes, so its trig terms are computed once
+COMMUTE_LAT = USER_SETTINGS["commute_target"]["lat"]
+COMMUTE_LON = USER_SETTINGS["commute_target"]["lon"]
+COMMUTE_COS_LAT = math.cos(math.radians(COMMUTE_LAT))
+DRIVE_MINUTES_PER_MILE = 1.4 / 25 * 60  # 1.4x road factor at 25 mph
+
+
+def haversine_to_commute_target(lat, lon):
+    """haversine_miles(lat, lon, commute target) with the target's terms precomputed."""
+    dlat = math.radians(COMMUTE_LAT - lat)
+    dlon = math.radians(COMMUTE_LON - lon)
+    a = math.sin(dlat/2)**2 + math.cos(math.radians(lat)) * COMMUTE_COS_LAT * math.sin(dlon/2)**2
+    return 3959 * 2 * math.asin(math.sqrt(a))
+
+
+def haversine_miles_many(lat, lon, elements):
+    """haversine_miles from (lat, lon) to every element, rounded to 0.01, in one NumPy pass."""
+    if not NUMPY_AVAILABLE:
+        return [round(haversine_miles(lat, lon, el["lat"], el["lon"]), 2) for el in elements]
+    lats = np.fromiter((el["lat"] for el in elements), dtype=np.float64, count=len(elements))
+    lons = np.fromiter((el["lon"] for el in elements), dtype=np.float64, count=len(elements))
+    dlat = np.radians(lats - lat)
+    dlon = np.radians(lons - lon)
+    a = np.sin(dlat / 2) ** 2 + math.cos(math.radians(lat)) * np.cos(np.radians(lats)) * np.sin(dlon / 2) ** 2
+    return np.round(3959 * 2 * np.arcsin(np.sqrt(a)), 2)
+
+
+# (radius_meters, tag key, tag value) for every POI the scorer looks at
+OVERPASS_SPECS = [
+    (2500, "amenity", "restaurant"),
+    (2500, "amenity", "cafe"),
+    (3000, "amenity", "bar"),
+    (3000, "amenity", "nightclub"),
+    (3000, "amenity", "cinema"),
+    (3000, "amenity", "school"),
+    (5000, "shop", "supermarket"),
+    (16000, "shop", "wholesale"),  # Costco/Sam's Club - wider radius
+]
+
+# Only the number of transit stops is used, so Overpass just counts them
+OVERPASS_COUNT_SPECS = [
+    (1000, "highway", "bus_stop"),
+    (2000, "railway", "station"),
+]
+
+
+# The only tags poi_bucket / fetch_neighborhood read; everything else is dropped
+# before elements are cached
+OVERPASS_KEPT_TAGS = ("name", "amenity", "shop", "highway", "railway")
+
+
+def slim_element(el):
+    """Keeps a node's coordinates and the tags we use (other elements pass through)."""
+    if "lat" not in el or "lon" not in el:
+        return el
+    tags = el.get("tags", {})
+    return {"lat": el["lat"], "lon": el["lon"],
+            "tags": {k: tags[k] for k in OVERPASS_KEPT_TAGS if k in tags}}
+
+
+def overpass_filters(lat, lon, specs, named=False):
+    """
+    One node statement per (radius, key): values sharing both become a
+    single anchored regex, so Overpass runs one around-search for them.
+    named=True also requires a name tag.
+    """
+    values_by_search = {}
+    for radius, key, value in specs:
+        values_by_search.setdefault((radius, key), []).append(value)
+
+    name_filter = "[name]" if named else ""
+    filters = ""
+    for (radius, key), values in values_by_search.items():
+        tag = f'"{key}"="{values[0]}"' if len(values) == 1 else f'"{key}"~"^({"|".join(values)})$"'
+        filters += f'node[{tag}]{name_filter}(around:{radius},{lat},{lon});'
+    return filters
+
+
+# overpass-api.de gives each IP ~2 query slots; lookups beyond that queue here
+# instead of getting 429s
+OVERPASS_SLOTS = threading.BoundedSemaphore(2)
+
+# Tried in order - a query the main instance is rate-limiting or timing out
+# goes to an independent mirror instead of waiting it out
+OVERPASS_MIRRORS = [
+    "https://overpass-api.de/api/interpreter",
+    "https://overpass.kumi.systems/api/interpreter",
+]
+# ...so no retries against a mirror: a 429/504 or dropped connection goes
+# straight to the next one instead of backing off while holding a slot
+_overpass_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+for _mirror in OVERPASS_MIRRORS:
+    SESSION.mount(_mirror, _overpass_adapter)
+
+
+# Elements are cached per ~100m cell; distances are computed by the caller
+@disk_cache(key=lambda lat, lon, specs=OVERPASS_SPECS, count_specs=OVERPASS_COUNT_SPECS:
+            f"{round(lat, 3)}:{round(lon, 3)}:named:{specs}:{count_specs}")
+def overpass_multi(lat, lon, specs=OVERPASS_SPECS, count_specs=OVERPASS_COUNT_SPECS):
+    """
+    Single compound query: named nodes for every (radius, key, value) in specs
+    (in quadtile order, which skips Overpass's sort by id), plus one "count"
+    element totalling the nodes matched by count_specs.
+    """
+    query = f"""[out:json][timeout:25];
+    ({overpass_filters(lat, lon, specs, named=True)});
+    out body qt;
+    ({overpass_filters(lat, lon, count_specs)});
+    out count;"""
+    for url in OVERPASS_MIRRORS:
+        try:
+            with OVERPASS_SLOTS:
+                resp = SESSION.post(url, data={"data": query}, timeout=30)
+            resp.raise_for_status()
+            return [slim_element(el) for el in parse_json(resp).get("elements", [])]
+        except Exception as e:
+            print(f"Overpass error ({url}): {e}")
+    return []
 
 
-def overpass_wholesale(lat, lon):
-    """Separate query for Costco/wholesale with wider radius."""
-    query = f"""[out:json][timeout:15];
-    node["shop"="wholesale"](around:16000,{lat},{lon});
-    out body;"""
-    try:
-        resp = requests.post("https://overpass-api.de/api/interpreter", data={"data": query}, timeout=20)
-        return resp.json().get("elements", [])
-    except Exception as e:
-        print(f"Wholesale error: {e}")
-        return []
+# Background geocode + Overpass lookups, overlapped with page parsing
+lookup_pool = ThreadPoolExecutor(max_workers=4)
+
+
+def lookup_neighborhood(address):
+    """Geocode an address and fetch its neighborhood. Returns (coords, neighborhood)."""
+    coords = geocode(address)
+    if not coords:
+        return None, {}
+    return coords, fetch_neighborhood(coords["lat"], coords["lon"])
+
+
+# How many of the closest places fetch_neighborhood returns per bucket
+NEARBY_LIMITS = {"restaurants": 15, "nightlife": 15, "schools": 10, "grocery": 15}
+
+
+# (tag key, value) -> NEARBY_LIMITS bucket, checked in this order
+POI_BUCKETS = {
+    ("amenity", "restaurant"): "restaurants",
+    ("amenity", "cafe"): "restaurants",
+    ("amenity", "bar"): "nightlife",
+    ("amenity", "nightclub"): "nightlife",
+    ("amenity", "cinema"): "nightlife",
+    ("amenity", "school"): "schools",
+    ("shop", "supermarket"): "grocery",
+    ("shop", "wholesale"): "grocery",
+}
+# The compound query returns nodes out to the widest radius (wholesale),
+# so each tag is held to its own search radius here
+POI_RADIUS_MILES = {(key, value): radius / 1609.34 for radius, key, value in OVERPASS_SPECS}
+
+
+def poi_bucket(tags, miles):
+    """Maps an Overpass element's tags to its NEARBY_LIMITS bucket (or None if out of range)."""
+    for (key, value), bucket in POI_BUCKETS.items():
+        if tags.get(key) == value and miles <= POI_RADIUS_MILES[(key, value)]:
+            return bucket
+    return None
 
 
 def fetch_neighborhood(lat, lon):
-    """Fetch all neighborhood data with 2 API calls."""
+    """Fetch all neighborhood data with 1 API call."""
     results = {
         "restaurant_count": 0, "grocery_stores": [], "has_costco": False,
         "costco_distance": None, "nightlife_count": 0, "transit_count": 0,
@@ -485,52 +869,49 @@ def fetch_neighborhood(lat, lon):
         "restaurants_nearby": [], "nightlife_nearby": [], "schools_nearby": []
     }
 
-    elements = overpass_combined(lat, lon)
+    elements = overpass_multi(lat, lon)
+    transit_count = sum(int(el["tags"].get("nodes", 0)) for el in elements if el.get("type") == "count")
+    elements = [el for el in elements if "lat" in el and "lon" in el]
 
-    restaurants, bars, schools, grocery, transit = [], [], [], [], []
+    # Walk elements nearest-first so every bucket comes out sorted
+    distances = haversine_miles_many(lat, lon, elements)
+    if NUMPY_AVAILABLE:
+        order = np.argsort(distances, kind="stable").tolist()
+        distances = distances.tolist()
+    else:
+        order = sorted(range(len(elements)), key=distances.__getitem__)
+
+    # Count every element, but only build dicts for the ones we return
+    counts = dict.fromkeys(NEARBY_LIMITS, 0)
+    nearby = {bucket: [] for bucket in NEARBY_LIMITS}
 
-    for el in elements:
-        if "lat" not in el or "lon" not in el:
+    for i in order:
+        tags = elements[i].get("tags", {})
+        bucket = poi_bucket(tags, distances[i])
+        if bucket is None:
             continue
-        tags = el.get("tags", {})
+        counts[bucket] += 1
         name = tags.get("name", "Unnamed")
-        dist = haversine_miles(lat, lon, el["lat"], el["lon"])
-        place = {"name": name, "distance_miles": round(dist, 2)}
 
-        amenity = tags.get("amenity", "")
-        shop = tags.get("shop", "")
+        if bucket == "grocery" and not results["has_costco"] and "costco" in name.lower():
+            results["has_costco"] = True
+            results["costco_distance"] = distances[i]
 
-        if amenity in ("restaurant", "cafe"): restaurants.append(place)
-        elif amenity in ("bar", "nightclub", "cinema"): bars.append(place)
-        elif amenity == "school": schools.append(place)
-        elif shop == "supermarket": grocery.append(place)
-        elif tags.get("highway") == "bus_stop" or tags.get("railway") == "station": transit.append(place)
+        if len(nearby[bucket]) < NEARBY_LIMITS[bucket]:
+            nearby[bucket].append({"name": name, "distance_miles": distances[i]})
 
-    time.sleep(1)
-    for el in overpass_wholesale(lat, lon):
-        if "lat" not in el or "lon" not in el:
-            continue
-        tags = el.get("tags", {})
-        name = tags.get("name", "Unnamed")
-        dist = haversine_miles(lat, lon, el["lat"], el["lon"])
-        grocery.append({"name": name, "distance_miles": round(dist, 2)})
-
-    grocery.sort(key=lambda x: x["distance_miles"])
-
-    results["restaurant_count"] = len(restaurants)
-    results["nightlife_count"] = len(bars)
-    results["school_count"] = len(schools)
-    results["transit_count"] = len(transit)
-    results["grocery_stores"] = grocery[:15]
-    results["transit_level"] = "nearby" if len(transit) >= 5 else ("some" if len(transit) >= 2 else "none")
-    results["has_costco"] = any("costco" in g["name"].lower() for g in grocery)
-    results["costco_distance"] = next((g["distance_miles"] for g in grocery if "costco" in g["name"].lower()), None)
-
-    commute_miles = haversine_miles(lat, lon, USER_SETTINGS["commute_target"]["lat"], USER_SETTINGS["commute_target"]["lon"])
-    results["commute_minutes"] = round((commute_miles * 1.4 / 25) * 60)
-    results["restaurants_nearby"] = sorted(restaurants, key=lambda x: x["distance_miles"])[:15]
-    results["nightlife_nearby"] = sorted(bars, key=lambda x: x["distance_miles"])[:15]
-    results["schools_nearby"] = sorted(schools, key=lambda x: x["distance_miles"])[:10]
+    results["restaurant_count"] = counts["restaurants"]
+    results["nightlife_count"] = counts["nightlife"]
+    results["school_count"] = counts["schools"]
+    results["transit_count"] = transit_count
+    results["grocery_stores"] = nearby["grocery"]
+    results["transit_level"] = "nearby" if transit_count >= 5 else ("some" if transit_count >= 2 else "none")
+
+    commute_miles = haversine_to_commute_target(lat, lon)
+    results["commute_minutes"] = round(commute_miles * DRIVE_MINUTES_PER_MILE)
+    results["restaurants_nearby"] = nearby["restaurants"]
+    results["nightlife_nearby"] = nearby["nightlife"]
+    results["schools_nearby"] = nearby["schools"]
 
     return results
 
@@ -556,17 +937,13 @@ def score_rooms(beds, baths, sqft):
     sqft_score = 20 if sqft >= USER_SETTINGS["ideal_sqft"] else (10 if sqft >= USER_SETTINGS["ideal_sqft"] * 0.8 else 0)
     return round(bed_score + bath_score + sqft_score)
 
-def score_necessities(amenities):
-    for n in USER_SETTINGS["necessities"]:
-        if n not in amenities:
-            return 0
-    return 100
+def score_necessities(mask):
+    return 100 if mask & NECESSITY_MASK == NECESSITY_MASK else 0
 
-def score_nice_to_haves(amenities):
-    total = len(USER_SETTINGS["nice_to_haves"])
-    if total == 0: return 100
-    count = sum(1 for n in USER_SETTINGS["nice_to_haves"] if n in amenities)
-    return round((count / total) * 100)
+def score_nice_to_haves(mask):
+    if NICE_TO_HAVE_TOTAL == 0: return 100
+    count = (mask & NICE_TO_HAVE_MASK).bit_count()
+    return round((count / NICE_TO_HAVE_TOTAL) * 100)
 
 def score_restaurants(count):
     return min(100, round((count / 20) * 50) + 35)
@@ -584,14 +961,19 @@ def score_nightlife(count):
 
 def score_grocery(stores):
     if not stores: return 0
-    nearby = [g for g in stores if g["distance_miles"] <= 3]
-    variety = min(40, round((len(set(g["name"].lower() for g in nearby)) / 5) * 40))
-    closest = min(g["distance_miles"] for g in stores)
+    # One pass: names within 3 mi, closest store, closest Costco (each name lowered once)
+    nearby_names = set()
+    closest = cd = math.inf
+    for g in stores:
+        dist = g["distance_miles"]
+        name = g["name"].lower()
+        if dist <= 3: nearby_names.add(name)
+        if dist < closest: closest = dist
+        if dist < cd and "costco" in name: cd = dist
+    variety = min(40, round((len(nearby_names) / 5) * 40))
     prox = 30 if closest <= 0.5 else (25 if closest <= 1 else (15 if closest <= 2 else (10 if closest <= 3 else 0)))
-    costco_list = [g for g in stores if "costco" in g["name"].lower()]
     costco = 0
-    if costco_list:
-        cd = min(c["distance_miles"] for c in costco_list)
+    if cd != math.inf:
         costco = 30 if cd <= 3 else (20 if cd <= 5 else (10 if cd <= 10 else 0))
     return round(variety + prox + costco)
 
@@ -602,16 +984,16 @@ def calculate_all_scores(apt, nbr):
     s = {}
     s["price"] = score_price(apt.get("rent") or 0)
     s["rooms"] = score_rooms(apt.get("bedrooms") or 2, apt.get("bathrooms") or 2, apt.get("sqft") or 0)
-    s["necessities"] = score_necessities(apt.get("amenities", []))
-    s["nice_to_haves"] = score_nice_to_haves(apt.get("amenities", []))
+    amenities = amenity_mask(apt.get("amenities", []))
+    s["necessities"] = score_necessities(amenities)
+    s["nice_to_haves"] = score_nice_to_haves(amenities)
     s["schools"] = score_schools(nbr.get("school_count", 0))
     s["crime"] = 65
     s["restaurants"] = score_restaurants(nbr.get("restaurant_count", 0))
     s["commute"] = score_commute(nbr.get("commute_minutes", 60), nbr.get("transit_level", "none"))
     s["nightlife"] = score_nightlife(nbr.get("nightlife_count", 0))
     s["grocery"] = score_grocery(nbr.get("grocery_stores", []))
-    vals = list(s.values())
-    s["overall"] = round(sum(vals) / len(vals))
+    s["overall"] = round(sum(s.values()) / len(s))
     return s
 
 
@@ -619,14 +1001,17 @@ def calculate_all_scores(apt, nbr):
 # API ENDPOINTS
 # ============================================
 
-apartment_db = []
-
 @app.route("/api/score", methods=["POST"])
 def score_from_url():
     body = request.json
     url = body.get("url", "")
 
-    scraped = scrape_apartment(url) if url else {"scraped": False}
+    lookups = {}
+
+    def start_lookup(address):
+        lookups[address] = lookup_pool.submit(lookup_neighborhood, address)
+
+    scraped = scrape_apartment(url, on_address=start_lookup) if url else {"scraped": False}
 
     if not scraped.get("scraped"):
         return jsonify({"status": "scrape_failed", "error": scraped.get("error", "Could not scrape"), "needs_manual": True})
@@ -642,12 +1027,12 @@ def score_from_url():
     address = scraped.get("address", "")
     coords = None
     if address:
-        coords = geocode(address)
-        if coords:
-            neighborhood = fetch_neighborhood(coords["lat"], coords["lon"])
+        # Usually already started mid-scrape; generic pages only find the address at the end
+        lookup = lookups.get(address) or lookup_pool.submit(lookup_neighborhood, address)
+        coords, neighborhood = lookup.result()
 
     scored_plans = []
-    for i, plan in enumerate(matching):
+    for plan in matching:
         rent = plan.get("rent", 0)
         if not rent and plan.get("units"):
             rents = [u["rent"] for u in plan["units"] if u.get("rent")]
@@ -668,7 +1053,7 @@ def score_from_url():
             "units_available": plan.get("units", []),
             "deposit": plan.get("deposit"),
             "neighborhood_data": neighborhood,
-            "id": str(int(time.time() * 1000)) + str(i)
+            "id": uuid.uuid4().hex
         }
         if coords:
             apt["lat"] = coords["lat"]
@@ -677,7 +1062,7 @@ def score_from_url():
         apt["scores"] = calculate_all_scores(apt, neighborhood)
         scored_plans.append(apt)
 
-    apartment_db.extend(scored_plans)
+    apartment_store.save_apartments(scored_plans)
 
     return jsonify({
         "status": "success",
@@ -704,7 +1089,7 @@ def score_from_source():
     if not source:
         return jsonify({"status": "error", "error": "No source provided"})
 
-    soup = BeautifulSoup(source, "html.parser")
+    soup = BeautifulSoup(source, HTML_PARSER)
     page_text_lower = soup.get_text(separator=" ").lower()
 
     name = None
@@ -714,13 +1099,16 @@ def score_from_source():
 
     address = extract_address_adc(soup)
     floor_plans = extract_floor_plans_adc(soup)
-    amenities_raw = extract_amenities_adc(soup)
-    amenities_classified = classify_amenities_adc(amenities_raw, page_text_lower)
-    tour = extract_tour_adc(soup)
 
     if not floor_plans:
         return jsonify({"status": "no_plans", "error": "No floor plans found"})
 
+    # Start the network lookups, then finish parsing while they run
+    lookup = lookup_pool.submit(lookup_neighborhood, address) if address else None
+    amenities_raw = extract_amenities_adc(soup)
+    amenities_classified = classify_amenities_adc(amenities_raw, page_text_lower)
+    tour = extract_tour_adc(soup)
+
     matching = [p for p in floor_plans if p.get("bedrooms") == 2 and p.get("bathrooms") == 2]
     if not matching:
         matching = [p for p in floor_plans if p.get("bedrooms") == 2]
@@ -729,13 +1117,11 @@ def score_from_source():
 
     neighborhood = {}
     coords = None
-    if address:
-        coords = geocode(address)
-        if coords:
-            neighborhood = fetch_neighborhood(coords["lat"], coords["lon"])
+    if lookup:
+        coords, neighborhood = lookup.result()
 
     scored_plans = []
-    for i, plan in enumerate(matching):
+    for plan in matching:
         rent = plan.get("rent", 0)
         if not rent and plan.get("units"):
             rents = [u["rent"] for u in plan["units"] if u.get("rent")]
@@ -756,7 +1142,7 @@ def score_from_source():
             "units_available": plan.get("units", []),
             "deposit": plan.get("deposit"),
             "neighborhood_data": neighborhood,
-            "id": str(int(time.time() * 1000)) + str(i)
+            "id": uuid.uuid4().hex
         }
         if coords:
             apt["lat"] = coords["lat"]
@@ -765,7 +1151,7 @@ def score_from_source():
         apt["scores"] = calculate_all_scores(apt, neighborhood)
         scored_plans.append(apt)
 
-    apartment_db.extend(scored_plans)
+    apartment_store.save_apartments(scored_plans)
 
     return jsonify({
         "status": "success",
@@ -804,28 +1190,29 @@ def score_manual():
             neighborhood = fetch_neighborhood(coords["lat"], coords["lon"])
             apt["neighborhood_data"] = neighborhood
     apt["scores"] = calculate_all_scores(apt, neighborhood)
-    apt["id"] = str(int(time.time() * 1000))
-    apartment_db.append(apt)
+    apt["id"] = uuid.uuid4().hex
+    apartment_store.save_apartments([apt])
     return jsonify({"status": "success", "apartment": apt, "scores": apt["scores"]})
 
 
 @app.route("/api/apartments", methods=["GET"])
 def get_apartments():
-    return jsonify(apartment_db)
+    return jsonify(apartment_store.list_apartments())
 
 
 @app.route("/api/apartments/<apt_id>", methods=["DELETE"])
 def delete_apartment(apt_id):
-    global apartment_db
-    apartment_db = [a for a in apartment_db if a["id"] != apt_id]
+    apartment_store.delete_apartment(apt_id)
     return jsonify({"status": "deleted"})
 
 
 @app.route("/", methods=["GET"])
 def health():
-    return jsonify({"status": "running", "apartments_stored": len(apartment_db)})
+    return jsonify({"status": "running", "apartments_stored": apartment_store.count_apartments()})
 
 
 if __name__ == "__main__":
+    # Local development only - deploys run under gunicorn (see render.yaml).
+    # FLASK_DEBUG=1 turns the reloader/debugger back on.
     print("Apartment Scorer API running on http://localhost:5000")
-    app.run(debug=True, port=5000)
+    app.run(debug=os.environ.get("FLASK_DEBUG") == "1", port=5000, threaded=True)
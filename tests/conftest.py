@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import disk_cache
+
+
+@pytest.fixture(autouse=True)
+def tmp_cache(tmp_path, monkeypatch):
+    """Every test gets an empty cache database of its own."""
+    monkeypatch.setattr(disk_cache, "CACHE_DB", str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(disk_cache, "USE_CACHE", True)
+    monkeypatch.setattr(disk_cache, "_conn", None)
+    monkeypatch.setattr(disk_cache, "_memory", disk_cache.OrderedDict())
+    yield
+    if disk_cache._conn is not None:
+        disk_cache._conn.close()
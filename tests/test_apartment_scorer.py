@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+import apartment_scorer as scorer
+from apartment_scorer import USER_SETTINGS, as_config
+
+
+@pytest.mark.parametrize("call", [
+    lambda s: scorer.score_price(1900, s),
+    lambda s: scorer.score_rooms(2, 1, 820, s),
+    lambda s: scorer.score_necessities(["dishwasher", "ac"], s),
+    lambda s: scorer.score_nice_to_haves(["pool", "gym"], s),
+])
+def test_scorers_accept_settings_dict_or_config(call):
+    assert call(USER_SETTINGS) == call(as_config(USER_SETTINGS))
+
+
+@pytest.mark.parametrize("rating, points", [(4.36, 48), (4.26, 47), (3.14, 35), (4.5, 50), (5.0, 50), (None, 25)])
+def test_quality_points_use_the_exact_rating(rating, points):
+    assert scorer.score_restaurants(0, rating) == points
+
+
+@pytest.mark.parametrize("rent, points", [(2600, 40), (2600.0, 40), (2600.5, 40), (1750, 100), (1805, 94)])
+def test_score_price_returns_int(rent, points):
+    score = scorer.score_price(rent, USER_SETTINGS)
+
+    assert score == points and isinstance(score, int)
+
+
+AMENITIES = ["covered_parking", "dishwasher", "in_unit_laundry", "ac", "pool", "sauna_hot_tub", "gym", "package_lockers"]
+
+
+def sample_listings(n=300, seed=7):
+    rng = random.Random(seed)
+    apartments, neighborhoods = [], []
+    for _ in range(n):
+        apartments.append({
+            "rent": rng.randint(800, 4000),
+            "bedrooms": rng.randint(0, 4),
+            "bathrooms": rng.choice([1, 1.5, 2, 2.5, 3]),
+            "sqft": rng.randint(400, 1600),
+            "amenities": rng.sample(AMENITIES, rng.randint(0, len(AMENITIES))),
+        })
+        neighborhoods.append({
+            "school_ratings": rng.sample(range(1, 11), rng.randint(0, 4)),
+            "crime_index": rng.choice([None, rng.randint(0, 120)]),
+            "restaurant_count": rng.randint(0, 40),
+            "restaurant_avg_rating": rng.choice([None, round(rng.uniform(1, 5), 1), round(rng.uniform(1, 5), 2)]),
+            "drive_minutes": rng.randint(0, 70),
+            "transit_available": rng.choice(["none", "some", "nearby"]),
+            "nightlife_count": rng.randint(0, 20),
+            "nightlife_avg_rating": rng.choice([None, round(rng.uniform(1, 5), 1), round(rng.uniform(1, 5), 2)]),
+            "grocery_stores": [{"name": rng.choice(["Costco", "Aldi", "Cub", "Target"]),
+                                "distance_miles": round(rng.uniform(0, 12), 2)}
+                               for _ in range(rng.randint(0, 5))],
+        })
+    return apartments, neighborhoods
+
+
+def assert_batch_matches_scalar(apartments, neighborhoods):
+    scores, overall = scorer.score_apartments_batch(apartments, neighborhoods)
+    for i, (apartment, neighborhood) in enumerate(zip(apartments, neighborhoods)):
+        expected = scorer.score_apartment(apartment, neighborhood)
+        got = {key: int(scores[i][scorer.IDX[key]]) for key in scorer.CATEGORY_ORDER}
+        got["overall"] = int(overall[i])
+        assert got == expected, (apartment, neighborhood)
+
+
+@pytest.mark.skipif(not scorer.NUMBA_AVAILABLE, reason="numba not installed")
+def test_numba_batch_matches_scalar_scores():
+    assert_batch_matches_scalar(*sample_listings())
+
+
+@pytest.mark.skipif(not scorer.NUMPY_AVAILABLE, reason="numpy not installed")
+def test_numpy_batch_matches_scalar_scores(monkeypatch):
+    monkeypatch.setattr(scorer, "NUMBA_AVAILABLE", False)
+    assert_batch_matches_scalar(*sample_listings())
+
+
+def test_pure_python_batch_matches_scalar_scores(monkeypatch):
+    monkeypatch.setattr(scorer, "NUMPY_AVAILABLE", False)
+    assert_batch_matches_scalar(*sample_listings(n=50))
+
+
+def test_unknown_settings_amenities_are_rejected():
+    settings = {**USER_SETTINGS, "necessities": ["covered_parking", "elevator"]}
+
+    with pytest.raises(ValueError, match="elevator"):
+        scorer.score_necessities(["covered_parking"], settings)
+
+
+@pytest.mark.skipif(not scorer.NUMPY_AVAILABLE, reason="numpy not installed")
+def test_amenity_scorers_accept_numpy_masks():
+    import numpy as np
+    cfg = as_config(USER_SETTINGS)
+    mask = scorer.pack_amenities(USER_SETTINGS["necessities"] + ["pool"])
+
+    assert scorer.score_necessities(np.uint16(mask), cfg) == 100
+    assert scorer.score_nice_to_haves(np.uint16(mask), cfg) == 25
+
+
+def test_scoring_does_not_modify_grocery_stores():
+    stores = [{"name": "Costco", "distance_miles": 2.5}, {"name": "Aldi", "distance_miles": 0.4}]
+    neighborhood = {"grocery_stores": stores}
+
+    scorer.score_apartment({"rent": 1800, "bedrooms": 2, "bathrooms": 2, "sqft": 1000, "amenities": []}, neighborhood)
+    scorer.score_apartments_batch([{"rent": 1800, "bedrooms": 2, "bathrooms": 2, "sqft": 1000, "amenities": []}],
+                                  [neighborhood])
+
+    assert stores == [{"name": "Costco", "distance_miles": 2.5}, {"name": "Aldi", "distance_miles": 0.4}]
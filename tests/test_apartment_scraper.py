@@ -0,0 +1,27 @@
+import json
+
+import apartment_scraper
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "apartments.jsonl")
+    apartment_scraper.save_apartment({"name": "A", "rent": 1800}, path)
+    apartment_scraper.save_apartment({"name": "B", "rent": 1900}, path)
+
+    assert apartment_scraper.load_apartments(path) == [{"name": "A", "rent": 1800}, {"name": "B", "rent": 1900}]
+
+
+def test_legacy_json_is_carried_over(tmp_path):
+    legacy = tmp_path / "apartments.json"
+    legacy.write_text(json.dumps([{"name": "Old"}], indent=2))
+    path = str(tmp_path / "apartments.jsonl")
+
+    assert apartment_scraper.load_apartments(path) == [{"name": "Old"}]
+
+    apartment_scraper.save_apartment({"name": "New"}, path)
+    assert apartment_scraper.load_apartments(path) == [{"name": "Old"}, {"name": "New"}]
+    assert legacy.exists()
+
+
+def test_missing_files_load_empty(tmp_path):
+    assert apartment_scraper.load_apartments(str(tmp_path / "apartments.jsonl")) == []
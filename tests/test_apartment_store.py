@@ -0,0 +1,34 @@
+import pytest
+
+import apartment_store
+
+
+@pytest.fixture(autouse=True)
+def tmp_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(apartment_store, "STORE_DB", str(tmp_path / "apartments.sqlite"))
+    monkeypatch.setattr(apartment_store, "_conn", None)
+    yield
+    if apartment_store._conn is not None:
+        apartment_store._conn.close()
+
+
+def test_save_list_delete_round_trip():
+    first = {"id": "a1", "name": "First", "rent": 1800, "lat": 44.9, "lon": -93.2, "scores": {"overall": 71}}
+    second = {"id": "b2", "name": "Second", "rent": 2100}
+    apartment_store.save_apartments([first])
+    apartment_store.save_apartments([second])
+
+    assert apartment_store.list_apartments() == [first, second]
+    assert apartment_store.count_apartments() == 2
+
+    apartment_store.delete_apartment("a1")
+    assert apartment_store.list_apartments() == [second]
+    apartment_store.delete_apartment("missing")  # No-op
+    assert apartment_store.count_apartments() == 1
+
+
+def test_saving_an_existing_id_replaces_it():
+    apartment_store.save_apartments([{"id": "a1", "rent": 1800}])
+    apartment_store.save_apartments([{"id": "a1", "rent": 1700}])
+
+    assert apartment_store.list_apartments() == [{"id": "a1", "rent": 1700}]
@@ -0,0 +1,64 @@
+import disk_cache
+from disk_cache import cache_get, cache_set, disk_cache as cached_by, normalize_address
+
+
+def test_cache_set_then_get():
+    cache_set("geocode:1 main st", {"lat": 1.0, "lon": 2.0})
+
+    assert cache_get("geocode:1 main st") == {"lat": 1.0, "lon": 2.0}
+    assert cache_get("geocode:2 main st") is None
+
+
+def test_entries_survive_losing_the_memory_layer():
+    cache_set("k", [1, 2, 3])
+    disk_cache._memory.clear()
+
+    assert cache_get("k") == [1, 2, 3]
+
+
+def test_expired_entries_are_misses():
+    cache_set("k", "v")
+
+    assert cache_get("k", ttl=0) is None
+
+
+def test_decorator_hits_cache_and_skips_empty_results():
+    calls = []
+
+    @cached_by(key=normalize_address)
+    def lookup(address):
+        calls.append(address)
+        return {"lat": 1.0} if "main" in address.lower() else None
+
+    assert lookup("1 Main St.") == {"lat": 1.0}
+    assert lookup("1 main st") == {"lat": 1.0}  # Same normalized key: cache hit
+    assert lookup("nowhere") is None
+    assert lookup("nowhere") is None  # Empty result wasn't stored: called again
+    assert calls == ["1 Main St.", "nowhere", "nowhere"]
+
+
+def test_use_cache_off_always_misses(monkeypatch):
+    cache_set("k", "v")
+    monkeypatch.setattr(disk_cache, "USE_CACHE", False)
+
+    assert cache_get("k") is None
+
+
+def test_page_cache_round_trip():
+    disk_cache.page_cache_set("https://example.com/a", '"v1"', None, {"name": "A"})
+
+    etag, last_modified, parsed, ts = disk_cache.page_cache_get("https://example.com/a")
+    assert (etag, last_modified, parsed) == ('"v1"', None, {"name": "A"})
+    assert disk_cache.page_cache_get("https://example.com/b") is None
+
+
+def test_decorator_prefix_keeps_same_keys_apart():
+    @cached_by(key=normalize_address, prefix="server_geocode")
+    def geocode(address):
+        return {"lat": 1.0, "lon": 2.0}
+
+    geocode("1 Main St")
+
+    assert cache_get("server_geocode:1 main st") == {"lat": 1.0, "lon": 2.0}
+    assert cache_get("cli_geocode:1 main st") is None
+    assert cache_get("geocode:1 main st") is None
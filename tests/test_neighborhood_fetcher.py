@@ -0,0 +1,44 @@
+import neighborhood_fetcher as nf
+
+ORIGIN = (44.95, -93.25)
+# Degrees of latitude per km, near enough for placing test nodes
+KM = 1 / 111.0
+
+
+def node(name, km_north, **tags):
+    return {"name": name, "lat": ORIGIN[0] + km_north * KM, "lon": ORIGIN[1], "tags": tags}
+
+
+def run_groups(monkeypatch, nodes, groups):
+    monkeypatch.setattr(nf, "_fetch_osm_nodes", lambda lat, lon, filters: nodes)
+    return nf.query_osm_multi(*ORIGIN, groups)
+
+
+def test_node_outside_group_radius_is_excluded(monkeypatch):
+    # Pulled in by the 5 km supermarket search, but 4 km is outside the 2.5 km cafe radius
+    nodes = [
+        node("Near Cafe", 0.5, amenity="cafe"),
+        node("Far Market Cafe", 4.0, shop="supermarket", amenity="cafe"),
+    ]
+    found = run_groups(monkeypatch, nodes, {**nf.restaurant_groups(), **nf.grocery_groups()})
+
+    assert [p["name"] for p in found["cafe"]] == ["Near Cafe"]
+    assert [p["name"] for p in found["supermarket"]] == ["Far Market Cafe"]
+
+
+def test_groups_are_sorted_nearest_first(monkeypatch):
+    nodes = [
+        node("Third", 2.0, amenity="restaurant"),
+        node("First", 0.2, amenity="restaurant"),
+        node("Second", 1.0, amenity="restaurant"),
+    ]
+    found = run_groups(monkeypatch, nodes, nf.restaurant_groups())
+
+    assert [p["name"] for p in found["restaurant"]] == ["First", "Second", "Third"]
+    assert found["restaurant"][0]["distance_miles"] < found["restaurant"][1]["distance_miles"]
+
+
+def test_failed_query_returns_empty_groups(monkeypatch):
+    found = run_groups(monkeypatch, None, nf.restaurant_groups())
+
+    assert found == {"restaurant": [], "cafe": []}
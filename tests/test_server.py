@@ -0,0 +1,171 @@
+import io
+
+import requests
+from bs4 import BeautifulSoup
+
+import server
+
+ORIGIN = (44.95, -93.25)
+KM = 1 / 111.0
+
+
+def element(name, km_north, **tags):
+    return {"lat": ORIGIN[0] + km_north * KM, "lon": ORIGIN[1], "tags": {"name": name, **tags}}
+
+
+def test_fetch_neighborhood_holds_each_tag_to_its_radius(monkeypatch):
+    elements = [
+        element("Diner", 1.0, amenity="restaurant"),
+        # Inside the 5 km supermarket search, outside the 2.5 km restaurant one
+        element("Market Deli", 4.0, amenity="restaurant", shop="supermarket"),
+        element("Costco", 12.0, shop="wholesale"),
+        {"type": "count", "tags": {"nodes": "3"}},
+    ]
+    monkeypatch.setattr(server, "overpass_multi", lambda lat, lon: elements)
+
+    nbr = server.fetch_neighborhood(*ORIGIN)
+
+    assert nbr["restaurant_count"] == 1
+    assert [p["name"] for p in nbr["restaurants_nearby"]] == ["Diner"]
+    assert [g["name"] for g in nbr["grocery_stores"]] == ["Market Deli", "Costco"]
+    assert nbr["has_costco"] and nbr["costco_distance"] > 7
+    assert nbr["transit_count"] == 3 and nbr["transit_level"] == "some"
+
+
+def page_response(body, content_type):
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(body)
+    response.headers["Content-Type"] = content_type
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    return response
+
+
+def test_page_html_reads_undeclared_charset_as_utf8():
+    page = "<p>Café Lumière</p>".encode("utf-8")
+
+    assert server.page_html(page_response(page, "text/html")) == "<p>Café Lumière</p>"
+
+
+def test_page_html_honors_declared_charset():
+    page = "<p>Café</p>".encode("latin-1")
+
+    assert server.page_html(page_response(page, "text/html; charset=ISO-8859-1")) == "<p>Café</p>"
+
+
+LISTING_HTML = """<html><body>
+<h1 id="propertyName">The Lumen</h1>
+<div class="propertyAddressContainer"><h2>
+  <span class="delivery-address"><span>1234 Hennepin Ave,</span></span>
+  <span>Minneapolis,</span>
+  <span class="stateZipContainer"><span>MN</span> <span>55403</span></span>
+</h2></div>
+</body></html>"""
+LISTING_URL = "https://www.apartments.com/the-lumen/abc123/"
+
+
+def fake_pages(monkeypatch, *responses):
+    """SESSION.get returns responses in order; every request's headers are recorded."""
+    sent = []
+    queue = list(responses)
+
+    def get(url, headers=None, **kwargs):
+        sent.append(headers)
+        return queue.pop(0)
+
+    monkeypatch.setattr(server.SESSION, "get", get)
+    return sent
+
+
+def listing_response(status=200, body=LISTING_HTML, headers=None):
+    response = page_response(body.encode("utf-8"), "text/html; charset=utf-8")
+    response.status_code = status
+    response.headers.update(headers or {})
+    return response
+
+
+def test_scrape_reuses_fresh_parse_without_a_request(monkeypatch):
+    sent = fake_pages(monkeypatch, listing_response(headers={"ETag": '"v1"'}))
+
+    first = server.scrape_apartments_com(LISTING_URL)
+    addresses = []
+    second = server.scrape_apartments_com(LISTING_URL, on_address=addresses.append)
+
+    assert len(sent) == 1
+    assert second == first and first["name"] == "The Lumen"
+    assert addresses == ["1234 Hennepin Ave, Minneapolis, MN 55403"]
+
+
+def test_scrape_revalidates_stale_page_with_etag(monkeypatch):
+    sent = fake_pages(monkeypatch, listing_response(headers={"ETag": '"v1"'}),
+                      listing_response(status=304, body=""))
+    first = server.scrape_apartments_com(LISTING_URL)
+    monkeypatch.setattr(server, "PAGE_FRESH_SECONDS", 0)
+
+    second = server.scrape_apartments_com(LISTING_URL)
+
+    assert sent[1]["If-None-Match"] == '"v1"'
+    assert second == first
+
+
+def test_scrape_does_not_cache_pages_that_parse_to_nothing(monkeypatch):
+    blocked = "<html><body><p>Access denied</p></body></html>"
+    sent = fake_pages(monkeypatch, listing_response(body=blocked), listing_response())
+
+    assert server.scrape_apartments_com(LISTING_URL)["name"] is None
+    assert server.scrape_apartments_com(LISTING_URL)["name"] == "The Lumen"
+    assert len(sent) == 2
+
+
+def test_json_plan_models_walks_nested_json_in_order():
+    script = ('window.__DATA__ = {"rentals": {"models": ['
+              '{"ModelName": "A1", "Beds": 1, "Baths": 1, "MinSquareFeet": 640, "MinTotalMonthlyPrice": 1495},'
+              '{"ModelName": "B2", "Beds": 2, "Baths": 2, "MinSquareFeet": 1010, "MinTotalMonthlyPrice": 2210}'
+              ']}};')
+
+    assert list(server.json_plan_models(script)) == [("A1", 1, 1, 640, 1495), ("B2", 2, 2, 1010, 2210)]
+    assert list(server.json_plan_models("var x = notJson();")) == []
+
+
+def test_extract_plans_from_json_skips_bad_models():
+    html = ('<script>{"models": ['
+            '{"ModelName": "A1", "Beds": 1, "Baths": 1.0, "MinSquareFeet": 640, "MinTotalMonthlyPrice": 1495},'
+            '{"ModelName": "B2", "Beds": 2, "Baths": 2, "MinSquareFeet": 1010, "MinTotalMonthlyPrice": null}'
+            ']}</script>')
+    soup = BeautifulSoup(html, server.HTML_PARSER)
+
+    assert server.extract_plans_from_json(soup) == [
+        {"plan_name": "A1", "bedrooms": 1, "bathrooms": 1, "sqft": 640, "rent": 1495, "units": []}]
+
+
+def test_calculate_all_scores_uses_settings_masks():
+    apt = {"rent": 2200, "bedrooms": 2, "bathrooms": 2, "sqft": 1000,
+           "amenities": ["covered_parking", "dishwasher", "in_unit_laundry", "ac", "pool", "gym"]}
+
+    scores = server.calculate_all_scores(apt, {})
+
+    assert scores["necessities"] == 100
+    assert scores["nice_to_haves"] == 50
+
+
+def test_overpass_requests_are_not_retried():
+    for url in server.OVERPASS_MIRRORS:
+        assert server.SESSION.get_adapter(url).max_retries.total == 0
+    assert server.SESSION.get_adapter(server.NOMINATIM_URL).max_retries.total == 3
+
+
+def test_overpass_falls_through_to_next_mirror(monkeypatch):
+    tried = []
+
+    def post(url, data=None, timeout=None):
+        tried.append(url)
+        if len(tried) == 1:
+            refused = page_response(b"rate limited", "text/plain")
+            refused.status_code = 429
+            return refused
+        return page_response(b'{"elements": [{"type": "count", "tags": {"nodes": "4"}}]}', "application/json")
+
+    monkeypatch.setattr(server.SESSION, "post", post)
+
+    assert server.overpass_multi(10.0, 20.0) == [{"type": "count", "tags": {"nodes": "4"}}]
+    assert tried == server.OVERPASS_MIRRORS